@@ -1,6 +1,13 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from .middleware.compression import CompressionMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.profiling import ProfilingMiddleware
+from .middleware.tracing import TracingMiddleware
 from .routes.activity import router as activity_router
+from .routes.admin import router as admin_router
 from .routes.auth import router as auth_router
 from .routes.clone import router as clone_router
 from .routes.repos import router as repos_router
@@ -16,12 +23,34 @@ from .routes.import_zip import router as import_zip_router
 from .routes.shortcut import router as shortcut_router
 from .routes.suggest_commit import router as suggest_commit_router
 from .routes.offline_commit import router as offline_commit_router
+from .routes.history import router as history_router
 from .routes.lfs import router as lfs_router
+from .routes.log import router as log_router
+from .routes.maintenance import router as maintenance_router
+from .routes.metrics import router as metrics_router
 from .routes.keys import router as keys_router
 from .routes.secrets import router as secrets_router
+from .services.commit_log import commit_log_service
+from .services.maintenance import maintenance_scheduler
+from .services.secret_manager import SecretManager, secret_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Building the secret manager loads its key, so leave it to the first request unless keys are rotating.
+    if SecretManager.rotation_configured():
+        secret_manager.start_key_rotation()
+    maintenance_scheduler.start()
+    yield
+    maintenance_scheduler.stop()
+    commit_log_service.close_all()
 
 
-app = FastAPI(title="PocketGit", version="1.0.0")
+app = FastAPI(title="PocketGit", version="1.0.0", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(auth_router)
 app.include_router(clone_router)
@@ -42,3 +71,8 @@ app.include_router(lfs_router)
 app.include_router(keys_router)
 app.include_router(secrets_router)
 app.include_router(activity_router)
+app.include_router(log_router)
+app.include_router(history_router)
+app.include_router(maintenance_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
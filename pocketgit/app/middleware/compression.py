@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+SKIP_SCOPE_KEY = "pocketgit.skip_compression"
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+COMPRESSION_INPUT_BYTES = registry.counter(
+    "pocketgit_http_compression_input_bytes_total",
+    "Response body bytes passed to the compressor, by content encoding.",
+    ("encoding",),
+)
+COMPRESSION_OUTPUT_BYTES = registry.counter(
+    "pocketgit_http_compression_output_bytes_total",
+    "Compressed response body bytes sent, by content encoding.",
+    ("encoding",),
+)
+
+
+class GzipEncoder:
+    name = "gzip"
+    LEVEL = 6
+
+    def __init__(self, size: int = -1):
+        self._compressor = zlib.compressobj(self.LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def flush(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+    QUALITY = 5
+
+    def __init__(self, size: int = -1):
+        self._compressor = brotli.Compressor(quality=self.QUALITY)
+
+    def flush(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdEncoder:
+    name = "zstd"
+    LEVEL = 3
+
+    def __init__(self, size: int = -1):
+        # A known size is written to the frame header, which one-shot decoders require.
+        self._compressor = zstandard.ZstdCompressor(level=self.LEVEL).compressobj(size=size)
+
+    def flush(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encoders() -> Dict[str, Callable[[int], object]]:
+    encoders: Dict[str, Callable[[int], object]] = {}
+    if zstandard is not None:
+        encoders[ZstdEncoder.name] = ZstdEncoder
+    if brotli is not None:
+        encoders[BrotliEncoder.name] = BrotliEncoder
+    encoders[GzipEncoder.name] = GzipEncoder
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def negotiate(header: str, preference: Sequence[str]) -> Optional[str]:
+    """Pick the encoding the client weighs highest, breaking ties by ``preference`` order."""
+
+    weights = parse_accept_encoding(header)
+    if "x-gzip" in weights and "gzip" not in weights:
+        weights["gzip"] = weights["x-gzip"]
+    best, best_weight = None, 0.0
+    for name in preference:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def skip_compression(request: Request) -> None:
+    """Send this request's response uncompressed, e.g. when it carries already-compressed binary data."""
+
+    request.scope[SKIP_SCOPE_KEY] = True
+
+
+class CompressionMiddleware:
+    """Compress text responses with the best encoding the client accepts (zstd, br or gzip).
+
+    Only text-like content types are compressed, so images, archives and other binary data pass
+    through untouched, as do responses that already carry a ``Content-Encoding`` and those whose
+    route called ``skip_compression``. Complete bodies smaller than ``MINIMUM_SIZE`` are sent as is,
+    and so are bodies that would not shrink. Streaming responses are compressed chunk by chunk with
+    a flush after each one, so clients still receive every chunk as soon as it is produced. Bodies
+    of at least ``THREAD_SIZE`` bytes are compressed in a worker thread to keep the event loop free.
+    """
+
+    ENABLED = os.getenv("POCKETGIT_COMPRESSION", "1") != "0"
+    MINIMUM_SIZE = int(os.getenv("POCKETGIT_COMPRESSION_MIN_BYTES", "1024"))
+    THREAD_SIZE = int(os.getenv("POCKETGIT_COMPRESSION_THREAD_BYTES", "131072"))
+    ENCODINGS = os.getenv("POCKETGIT_COMPRESSION_ENCODINGS", "zstd,br,gzip")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = self.ENABLED
+        self.minimum_size = self.MINIMUM_SIZE
+        self.thread_size = self.THREAD_SIZE
+        self.encoders = available_encoders()
+        self.preference: List[str] = [
+            name for name in (item.strip().lower() for item in self.ENCODINGS.split(",")) if name in self.encoders
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _eligible(self, headers: Headers) -> bool:
+        status = self.start["status"]
+        return (
+            200 <= status < 300
+            and status != 204
+            and not self.scope.get(SKIP_SCOPE_KEY)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+
+    async def _encode(self, data: bytes, final: bool) -> bytes:
+        method = self.encoder.finish if final else self.encoder.flush
+        if len(data) >= self.middleware.thread_size:
+            encoded = await to_thread.run_sync(method, data)
+        else:
+            encoded = method(data)
+        COMPRESSION_INPUT_BYTES.inc(self.encoding, amount=len(data))
+        COMPRESSION_OUTPUT_BYTES.inc(self.encoding, amount=len(encoded))
+        return encoded
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message.get("headers", []))
+            if not self._eligible(headers):
+                self.passthrough = True
+                await self.downstream(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+            self.encoder = self.middleware.encoders[self.encoding](-1 if more_body else len(body))
+            encoded = await self._encode(body, final=not more_body)
+            if not more_body and len(encoded) >= len(body):
+                self.passthrough = True
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(encoded))
+            await self.downstream(start)
+            await self.downstream({**message, "body": encoded})
+            return
+
+        encoded = await self._encode(body, final=not more_body)
+        await self.downstream({**message, "body": encoded})
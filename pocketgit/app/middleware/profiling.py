@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+
+from anyio import to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.profiling import Profiler, current_profile, profiler as default_profiler
+from ..utils.tracing import request_id
+
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class ProfilingMiddleware:
+    """Run selected requests under the sampling profiler and store their collapsed stacks.
+
+    A request is profiled when it carries a valid signed ``X-PocketGit-Profile`` token or is picked by
+    ``POCKETGIT_PROFILE_SAMPLE_RATE``. The profile id is returned in ``X-Profile-Id``.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = default_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        token = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == Profiler.HEADER.encode("ascii")),
+            None,
+        )
+        if not self.profiler.should_profile(token):
+            await self.app(scope, receive, send)
+            return
+
+        session = self.profiler.session()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, session.profile_id.encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        reset_token = current_profile.set(session)
+        start = time.perf_counter()
+        session.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            current_profile.reset(reset_token)
+            await to_thread.run_sync(session.stop)
+            details = {
+                "requestId": request_id.get(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "durationMs": round(duration * 1000, 2),
+            }
+            await to_thread.run_sync(self.profiler.store.save, session, details)
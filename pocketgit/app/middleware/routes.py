@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from starlette.types import Scope
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RouteTemplates:
+    """Map a routed request back to its path template, so ``/repo/{repoId}/tree`` is one label, not one per repo."""
+
+    def __init__(self):
+        self._templates: Dict[Callable[..., Any], str] = {}
+
+    def __call__(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(endpoint)
+        if template is None:
+            router_app = scope.get("app")
+            for route in getattr(router_app, "routes", ()):
+                if getattr(route, "endpoint", None) is not None:
+                    self._templates.setdefault(route.endpoint, getattr(route, "path", UNMATCHED_ROUTE))
+            template = self._templates.setdefault(endpoint, UNMATCHED_ROUTE)
+        return template
+
+
+route_template = RouteTemplates()
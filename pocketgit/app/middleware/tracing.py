@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+import uuid
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.tracing import Tracer, current_span, request_id, tracer as default_tracer
+from .routes import route_template
+
+REQUEST_ID_HEADER = b"x-request-id"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class TracingMiddleware:
+    """Assign every request an id (``X-Request-ID``, echoed back) and open the root span of its trace."""
+
+    def __init__(self, app: ASGIApp, tracer: Tracer = default_tracer):
+        self.app = app
+        self.tracer = tracer
+
+    @staticmethod
+    def _incoming_id(scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                return candidate if REQUEST_ID_PATTERN.match(candidate) else None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rid = self._incoming_id(scope) or uuid.uuid4().hex
+        rid_token = request_id.set(rid)
+        span = self.tracer.start_span(
+            "HTTP",
+            {"http.method": scope["method"], "http.target": scope["path"], "http.request_id": rid},
+        )
+        span_token = None
+        if span is not None:
+            if TRACE_ID_PATTERN.match(rid):
+                # Generated ids are valid trace ids, so a request id can be looked up directly in the collector.
+                span.trace_id = rid
+            span_token = current_span.set(span)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, rid.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        error: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            if span is not None:
+                current_span.reset(span_token)
+                span.name = f"HTTP {scope['method']} {route_template(scope)}"
+                span.set("http.route", route_template(scope))
+                span.set("http.status_code", status_code)
+                span.finish(error)
+            request_id.reset(rid_token)
@@ -14,10 +14,11 @@ class CloneResponse(BaseModel):
 
 class RepoSummary(BaseModel):
     repoId: str
-    name: str
-    currentBranch: Optional[str]
-    ahead: int
-    behind: int
+    name: Optional[str] = None
+    currentBranch: Optional[str] = None
+    ahead: Optional[int] = None
+    behind: Optional[int] = None
+    profile: Optional[str] = None
 
 
 class BranchListResponse(BaseModel):
@@ -25,6 +26,21 @@ class BranchListResponse(BaseModel):
     branches: List[str]
 
 
+class BranchDetail(BaseModel):
+    name: str
+    oid: str
+    committedAt: Optional[str] = None
+    subject: str = ""
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+
+
+class BranchDetailListResponse(BaseModel):
+    current: Optional[str]
+    branches: List[BranchDetail]
+
+
 class OkResponse(BaseModel):
     ok: bool = True
 
@@ -93,6 +109,32 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
 
 
+class CommitInfo(BaseModel):
+    oid: str
+    parents: List[str]
+    authorName: str
+    authorEmail: str
+    authoredAt: str
+    committerName: str
+    committerEmail: str
+    committedAt: str
+    subject: str
+
+
+class CommitLogResponse(BaseModel):
+    commits: List[CommitInfo]
+    nextCursor: Optional[str] = None
+
+
+class FileHistoryEntry(CommitInfo):
+    path: Optional[str] = None
+
+
+class FileHistoryResponse(BaseModel):
+    commits: List[FileHistoryEntry]
+    nextCursor: Optional[str] = None
+
+
 class SSHKeyInfo(BaseModel):
     id: str
     name: Optional[str]
@@ -147,3 +189,39 @@ class ActivityEvent(BaseModel):
 
 class ActivityResponse(BaseModel):
     events: List[ActivityEvent]
+
+
+class GlobalActivityEvent(ActivityEvent):
+    repoId: str
+
+
+class GlobalActivityResponse(BaseModel):
+    events: List[GlobalActivityEvent]
+
+
+class MaintenanceStatusResponse(BaseModel):
+    looseObjects: int
+    packs: int
+    commitGraph: bool
+    multiPackIndex: bool
+    pendingTasks: List[str]
+    lastRun: Optional[str] = None
+    lastTasks: List[str] = []
+    lastSkipped: Optional[str] = None
+    lastError: Optional[str] = None
+
+
+class ProfileSummary(BaseModel):
+    profileId: str
+    createdAt: float
+    samples: int
+    intervalMs: float
+    requestId: Optional[str] = None
+    method: str
+    path: str
+    status: int
+    durationMs: float
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileSummary]
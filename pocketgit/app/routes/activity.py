@@ -1,39 +1,79 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Path
+from typing import Any, Dict, List, Optional
 
-from ..models.response_schemas import ActivityEvent, ActivityResponse
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+
+from ..models.response_schemas import ActivityResponse, GlobalActivityResponse
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.repo_manager import repo_manager
+from ..utils import conditional
+from ..utils.fast_json import FastJSONResponse
 
 
 router = APIRouter(tags=["activity"])
 
+BASE_FIELDS = {"ts", "action", "branch", "msg", "hash", "user"}
+
+
+def _normalize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    base = {
+        "ts": event.get("ts", ""),
+        "action": event.get("action", ""),
+        "branch": event.get("branch"),
+        "msg": event.get("msg"),
+        "hash": event.get("hash"),
+        "user": event.get("user"),
+    }
+    extras = {key: value for key, value in event.items() if key not in BASE_FIELDS}
+    base["details"] = extras or None
+    return base
+
+
+@router.get("/activity", response_model=GlobalActivityResponse)
+def get_global_activity(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    repo_ids: Optional[List[str]] = Query(None, alias="repoId"),
+    actions: Optional[List[str]] = Query(None, alias="action"),
+    user: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
+    current_user: str = Depends(get_current_user),
+) -> FastJSONResponse:
+    if repo_ids is not None:
+        # Only ids of existing repositories reach the log paths, each once.
+        repo_ids = list(dict.fromkeys(repo_ids))
+        if not set(repo_ids) <= set(repo_manager.list_repo_ids()):
+            raise HTTPException(status_code=404, detail="Repository not found")
+    entries = activity_logger.read_all(
+        limit=limit,
+        offset=offset,
+        repo_ids=repo_ids,
+        actions=actions,
+        user=user,
+        since=since,
+        before=before,
+    )
+    events = [{**_normalize_event(event), "repoId": repo_id} for repo_id, event in entries]
+    return FastJSONResponse({"events": events})
+
 
-@router.get("/repo/{repo_id}/activity", response_model=ActivityResponse)
+@router.get("/repo/{repoId}/activity", response_model=ActivityResponse)
 def get_activity(
+    request: Request,
     repo_id: str = Path(..., alias="repoId"),
     current_user: str = Depends(get_current_user),
-) -> ActivityResponse:
-    repo_manager.get_repo(repo_id)
+) -> Response:
+    repo = repo_manager.get_repo(repo_id)
+    # Routes append to the log after their repository operation ends, so the generation token
+    # alone can be stale; the log's own stat covers every append.
+    etag = repo.state_validator("activity", activity_logger.stamp(repo_id))
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     events = activity_logger.read(repo_id)
-    normalized: list[ActivityEvent] = []
-    for event in events:
-        base = {
-            "ts": event.get("ts", ""),
-            "action": event.get("action", ""),
-            "branch": event.get("branch"),
-            "msg": event.get("msg"),
-            "hash": event.get("hash"),
-            "user": event.get("user"),
-        }
-        extras = {
-            key: value
-            for key, value in event.items()
-            if key not in {"ts", "action", "branch", "msg", "hash", "user"}
-        }
-        if extras:
-            base["details"] = extras
-        normalized.append(ActivityEvent(**base))
-    return ActivityResponse(events=normalized)
+    response = FastJSONResponse({"events": [_normalize_event(event) for event in events]})
+    conditional.tag(response, etag)
+    return response
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path
+from fastapi.responses import PlainTextResponse
+
+from ..models.response_schemas import ProfileListResponse, ProfileSummary
+from ..utils.profiling import profiler, verify_token
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_admin(token: Optional[str] = Header(None, alias="X-PocketGit-Admin")) -> None:
+    if not verify_token(profiler.secret, token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@router.get("/profiles", response_model=ProfileListResponse, dependencies=[Depends(require_admin)])
+def list_profiles() -> ProfileListResponse:
+    return ProfileListResponse(profiles=[ProfileSummary(**profile) for profile in profiler.store.list()])
+
+
+@router.get("/profiles/{profileId}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str = Path(..., alias="profileId")) -> PlainTextResponse:
+    try:
+        collapsed = profiler.store.read(profile_id)
+    except (FileNotFoundError, OSError) as exc:
+        raise HTTPException(status_code=404, detail="Profile not found") from exc
+    return PlainTextResponse(collapsed)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+import math
+
+from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel
 
 from ..models.response_schemas import OkResponse
-from ..services.auth_service import auth_service
+from ..services.auth_service import AuthBusyError, AuthThrottledError, auth_service
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,10 +21,20 @@ class LoginResponse(BaseModel):
     token: str
 
 
+def _busy(exc: AuthBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=OkResponse, status_code=status.HTTP_201_CREATED)
-def register(payload: AuthRequest) -> OkResponse:
+async def register(payload: AuthRequest) -> OkResponse:
     try:
-        auth_service.create_user(payload.username, payload.password)
+        await auth_service.create_user_async(payload.username, payload.password)
+    except AuthBusyError as exc:
+        raise _busy(exc) from exc
     except ValueError as exc:
         message = str(exc)
         if "already exists" in message:
@@ -32,8 +44,19 @@ def register(payload: AuthRequest) -> OkResponse:
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(payload: AuthRequest) -> LoginResponse:
-    if not auth_service.authenticate_user(payload.username, payload.password):
+async def login(payload: AuthRequest, request: Request) -> LoginResponse:
+    client = request.client.host if request.client else None
+    try:
+        authenticated = await auth_service.authenticate_user_async(payload.username, payload.password, client)
+    except AuthThrottledError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        ) from exc
+    except AuthBusyError as exc:
+        raise _busy(exc) from exc
+    if not authenticated:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     token = auth_service.create_access_token(payload.username)
     return LoginResponse(token=token)
@@ -1,27 +1,55 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Path
-from git import GitCommandError
+from typing import Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 
 from ..models.request_schemas import BranchCreateRequest, BranchDeleteRequest, BranchSwitchRequest
-from ..models.response_schemas import BranchListResponse, BranchSwitchResponse, OkResponse
+from ..models.response_schemas import (
+    BranchDetailListResponse,
+    BranchListResponse,
+    BranchSwitchResponse,
+    OkResponse,
+)
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user, get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..utils import conditional
+from ..utils.lazy import lazy_import
+
+git = lazy_import("git")
 
 router = APIRouter()
 
 
-@router.get("/repo/{repo_id}/branches", response_model=BranchListResponse)
+@router.get("/repo/{repoId}/branches", response_model=Union[BranchListResponse, BranchDetailListResponse])
 def list_branches(
+    request: Request,
+    response: Response,
     repo_id: str = Path(..., alias="repoId"),
+    detail: bool = Query(False),
+    sort: str = Query("recent"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: str | None = Depends(get_optional_current_user),
-) -> BranchListResponse:
+) -> Union[BranchListResponse, BranchDetailListResponse, Response]:
     repo = repo_manager.get_repo(repo_id)
-    return BranchListResponse(current=repo.get_current_branch(), branches=repo.list_branches())
+    etag = repo.state_validator("branches", detail, sort, offset, limit)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    conditional.tag(response, etag)
+    if not detail:
+        return BranchListResponse(current=repo.get_current_branch(), branches=repo.list_branches())
+    try:
+        total, branches = repo.list_branch_details(sort=sort, offset=offset, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    response.headers["X-Total-Count"] = str(total)
+    return BranchDetailListResponse(current=repo.get_current_branch(), branches=branches)
 
 
-@router.post("/repo/{repo_id}/branch/create", response_model=OkResponse)
+@router.post("/repo/{repoId}/branch/create", response_model=OkResponse)
 def create_branch(
     payload: BranchCreateRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -30,7 +58,7 @@ def create_branch(
     repo = repo_manager.get_repo(repo_id)
     try:
         repo.create_branch(payload.name, payload.from_)
-    except GitCommandError as exc:
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -43,7 +71,7 @@ def create_branch(
     return OkResponse()
 
 
-@router.post("/repo/{repo_id}/branch/switch", response_model=BranchSwitchResponse)
+@router.post("/repo/{repoId}/branch/switch", response_model=BranchSwitchResponse)
 def switch_branch(
     payload: BranchSwitchRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -52,7 +80,7 @@ def switch_branch(
     repo = repo_manager.get_repo(repo_id)
     try:
         current = repo.switch_branch(payload.name)
-    except GitCommandError as exc:
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -64,7 +92,7 @@ def switch_branch(
     return BranchSwitchResponse(ok=True, current=current)
 
 
-@router.delete("/repo/{repo_id}/branch", response_model=OkResponse)
+@router.delete("/repo/{repoId}/branch", response_model=OkResponse)
 def delete_branch(
     payload: BranchDeleteRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -73,7 +101,7 @@ def delete_branch(
     repo = repo_manager.get_repo(repo_id)
     try:
         repo.delete_branch(payload.name)
-    except GitCommandError as exc:
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
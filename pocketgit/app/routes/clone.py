@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from git import GitCommandError
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from urllib.parse import urlparse, urlunparse
 
 from ..models.request_schemas import CloneRequest
@@ -9,10 +10,22 @@ from ..models.response_schemas import CloneResponse
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.repo_manager import repo_manager
+from ..services.ssh_pool import SSHPoolBusyError
+from ..utils.lazy import lazy_import
+
+git = lazy_import("git")
 
 router = APIRouter()
 
 
+def _ssh_busy(exc: SSHPoolBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 def _sanitize_url(url: str) -> str:
     parsed = urlparse(url)
     if parsed.username or parsed.password:
@@ -31,7 +44,9 @@ def clone_repo(payload: CloneRequest, current_user: str = Depends(get_current_us
     try:
         auth = payload.auth.dict() if payload.auth else None
         repo = repo_manager.clone_repository(payload.url, payload.branch, auth, payload.sshKeyId)
-    except GitCommandError as exc:
+    except SSHPoolBusyError as exc:
+        raise _ssh_busy(exc) from exc
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     metadata = repo.read_metadata()
     branches = repo.list_branches()
@@ -1,35 +1,43 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from typing import Optional, Union
 
 from ..models.request_schemas import FileWriteRequest
 from ..models.response_schemas import FileResponse, OkResponse
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user, get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..utils import conditional
 from ..utils.fs_utils import InvalidPathError
 
 router = APIRouter()
 
 
-@router.get("/repo/{repo_id}/file", response_model=FileResponse)
+@router.get("/repo/{repoId}/file", response_model=FileResponse)
 def read_file(
+    request: Request,
+    response: Response,
     repo_id: str = Path(..., alias="repoId"),
     path: str = Query(...),
     current_user: Optional[str] = Depends(get_optional_current_user),
-) -> FileResponse:
+) -> Union[FileResponse, Response]:
     repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("file", path)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     try:
         content = repo.read_file(path)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail="File not found") from exc
     except InvalidPathError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    conditional.tag(response, etag)
     return FileResponse(path=path, content=content)
 
 
-@router.put("/repo/{repo_id}/file", response_model=OkResponse)
+@router.put("/repo/{repoId}/file", response_model=OkResponse)
 def write_file(
     payload: FileWriteRequest,
     repo_id: str = Path(..., alias="repoId"),
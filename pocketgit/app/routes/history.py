@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+from typing import Iterator, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from ..models.response_schemas import FileHistoryResponse
+from ..services.auth_service import get_optional_current_user
+from ..services.repo_manager import repo_manager
+from ..utils import conditional
+
+router = APIRouter()
+
+
+@router.get("/repo/{repoId}/history", response_model=FileHistoryResponse)
+def get_file_history(
+    request: Request,
+    response: Response,
+    repo_id: str = Path(..., alias="repoId"),
+    path: str = Query(..., min_length=1),
+    ref: str = Query("HEAD"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Optional[str] = Depends(get_optional_current_user),
+) -> Union[FileHistoryResponse, Response]:
+    repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("history", path, ref, cursor, limit)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        page = repo.get_file_history(path, ref=ref, cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    conditional.tag(response, etag)
+    return FileHistoryResponse(**page)
+
+
+def _ndjson(hunks: Iterator[dict]) -> Iterator[str]:
+    for hunk in hunks:
+        yield json.dumps(hunk) + "\n"
+
+
+@router.get("/repo/{repoId}/blame")
+def get_blame(
+    repo_id: str = Path(..., alias="repoId"),
+    path: str = Query(..., min_length=1),
+    ref: str = Query("HEAD"),
+    current_user: Optional[str] = Depends(get_optional_current_user),
+) -> StreamingResponse:
+    repo = repo_manager.get_repo(repo_id)
+    try:
+        oid, hunks = repo.blame(path, ref=ref)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail="File not found") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(
+        _ndjson(hunks),
+        media_type="application/x-ndjson",
+        headers={"X-Blame-Commit": oid},
+    )
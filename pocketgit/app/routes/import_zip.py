@@ -3,18 +3,23 @@ from __future__ import annotations
 import io
 import shutil
 from pathlib import Path
-from typing import Optional, Set
+from typing import TYPE_CHECKING, Optional, Set
 from zipfile import BadZipFile, ZipFile
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from git import Actor, GitCommandError, Repo
 
 from ..models.response_schemas import CloneResponse
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.git_repo import GitRepo, RepoMetadata
+from ..services.repo_profile import repo_profile_service
 from ..services.repo_manager import repo_manager
+from ..utils.lazy import lazy_import
 
+if TYPE_CHECKING:
+    from git import Repo
+
+git = lazy_import("git")
 
 router = APIRouter()
 
@@ -89,6 +94,12 @@ def _detect_remote_url(repo: Repo) -> Optional[str]:
             return None
 
 
+def _discard_import(target_path: Path, repo_id: str) -> None:
+    shutil.rmtree(target_path, ignore_errors=True)
+    # The metadata may already be in the SQLite store, which would otherwise keep an orphaned row.
+    RepoMetadata.discard(repo_id)
+
+
 @router.post("/import-zip", response_model=CloneResponse)
 async def import_zip(
     file: UploadFile = File(...),
@@ -131,12 +142,12 @@ async def import_zip(
 
         git_dir = target_path / ".git"
         if not git_dir.exists():
-            repo = Repo.init(target_path)
+            repo = git.Repo.init(target_path)
             repo.git.add(A=True)
-            actor = Actor("Imported", "import@local")
+            actor = git.Actor("Imported", "import@local")
             repo.index.commit("Initial import", author=actor, committer=actor, allow_empty=True)
         else:
-            repo = Repo(target_path)
+            repo = git.Repo(target_path)
 
         try:
             default_branch = repo.active_branch.name
@@ -148,19 +159,20 @@ async def import_zip(
             remote_url=_detect_remote_url(repo),
             default_branch=default_branch,
             name=display_name,
+            profile=repo_profile_service.apply(target_path),
         )
         metadata.to_file(target_path / GitRepo.METADATA_FILENAME)
 
         git_repo = GitRepo(repo_id, repo_manager.base_path)
         branches = git_repo.list_branches()
     except HTTPException:
-        shutil.rmtree(target_path, ignore_errors=True)
+        _discard_import(target_path, repo_id)
         raise
-    except (GitCommandError, OSError) as exc:
-        shutil.rmtree(target_path, ignore_errors=True)
+    except (git.GitCommandError, OSError) as exc:
+        _discard_import(target_path, repo_id)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to initialize repository: {exc}") from exc
     except Exception as exc:  # noqa: BLE001
-        shutil.rmtree(target_path, ignore_errors=True)
+        _discard_import(target_path, repo_id)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
     response = CloneResponse(
@@ -1,28 +1,50 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from typing import Optional
 
+from ..middleware.compression import skip_compression
 from ..models.response_schemas import LFSFetchResponse, LFSListResponse
 from ..services.auth_service import get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..services.ssh_pool import SSHPoolBusyError
+from ..utils import conditional
+from ..utils.fast_json import FastJSONResponse
 from ..utils.fs_utils import InvalidPathError
 
 router = APIRouter()
 
 
-@router.get("/repo/{repo_id}/lfs/list", response_model=LFSListResponse)
+def _ssh_busy(exc: SSHPoolBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@router.get("/repo/{repoId}/lfs/list", response_model=LFSListResponse)
 def list_lfs_files(
+    request: Request,
     repo_id: str = Path(..., alias="repoId"),
     current_user: Optional[str] = Depends(get_optional_current_user),
-) -> LFSListResponse:
+) -> Response:
     repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("lfs")
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     files = repo.list_lfs_pointers()
-    return LFSListResponse(files=files)
+    response = FastJSONResponse({"files": files})
+    conditional.tag(response, etag)
+    return response
 
 
-@router.get("/repo/{repo_id}/lfs/fetch", response_model=LFSFetchResponse)
+@router.get("/repo/{repoId}/lfs/fetch", response_model=LFSFetchResponse)
 def fetch_lfs_file(
+    request: Request,
     repo_id: str = Path(..., alias="repoId"),
     path: str = Query(...),
     current_user: Optional[str] = Depends(get_optional_current_user),
@@ -34,6 +56,10 @@ def fetch_lfs_file(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail="File not found") from exc
+    except SSHPoolBusyError as exc:
+        raise _ssh_busy(exc) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # LFS objects are mostly images and archives; their base64 text is not worth compressing again.
+    skip_compression(request)
     return LFSFetchResponse(**payload)
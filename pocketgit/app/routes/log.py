@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+
+from ..models.response_schemas import CommitLogResponse
+from ..services.auth_service import get_optional_current_user
+from ..services.repo_manager import repo_manager
+from ..utils import conditional
+
+router = APIRouter()
+
+
+@router.get("/repo/{repoId}/log", response_model=CommitLogResponse)
+def get_log(
+    request: Request,
+    response: Response,
+    repo_id: str = Path(..., alias="repoId"),
+    ref: str = Query("HEAD"),
+    path: Optional[str] = Query(None),
+    author: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Optional[str] = Depends(get_optional_current_user),
+) -> Union[CommitLogResponse, Response]:
+    repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("log", ref, path, author, cursor, limit)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        page = repo.get_log(ref=ref, path=path, author=author, cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    conditional.tag(response, etag)
+    return CommitLogResponse(**page)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+
+from ..models.response_schemas import MaintenanceStatusResponse
+from ..services.auth_service import get_optional_current_user
+from ..services.maintenance import maintenance_scheduler
+from ..services.repo_manager import repo_manager
+
+router = APIRouter()
+
+
+@router.get("/repo/{repoId}/maintenance", response_model=MaintenanceStatusResponse)
+def get_maintenance_status(
+    repo_id: str = Path(..., alias="repoId"),
+    current_user: Optional[str] = Depends(get_optional_current_user),
+) -> MaintenanceStatusResponse:
+    repo_manager.get_repo(repo_id)
+    status = maintenance_scheduler.status(repo_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    return MaintenanceStatusResponse(**status)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from anyio import to_thread
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..utils.metrics import registry
+
+router = APIRouter()
+
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    if not registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    # Synchronous routes run on AnyIO's worker threads; the limiter shows how saturated that pool is.
+    limiter = to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    extra = {
+        "pocketgit_threadpool_busy_threads": ("Worker threads serving synchronous routes.", statistics.borrowed_tokens),
+        "pocketgit_threadpool_capacity": ("Size of the synchronous route thread pool.", limiter.total_tokens),
+        "pocketgit_threadpool_queue_depth": ("Requests waiting for a worker thread.", statistics.tasks_waiting),
+    }
+    return PlainTextResponse(registry.render(extra), media_type=EXPOSITION_CONTENT_TYPE)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Path
-from git import GitCommandError
 
 from ..models.request_schemas import OfflineCommitRequest
 from ..models.response_schemas import OfflineCommitResponse
@@ -9,6 +8,9 @@ from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.repo_manager import repo_manager
 from ..utils.fs_utils import InvalidPathError
+from ..utils.lazy import lazy_import
+
+git = lazy_import("git")
 
 router = APIRouter()
 
@@ -16,7 +18,7 @@ DEFAULT_AUTHOR_NAME = "PocketGit Offline"
 DEFAULT_AUTHOR_EMAIL = "offline@pocketgit"
 
 
-@router.post("/repo/{repo_id}/offline-commit", response_model=OfflineCommitResponse)
+@router.post("/repo/{repoId}/offline-commit", response_model=OfflineCommitResponse)
 def offline_commit(
     payload: OfflineCommitRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -55,7 +57,7 @@ def offline_commit(
 
     try:
         commit_hash = repo.commit(message, author_name, author_email)
-    except GitCommandError as exc:
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     activity_logger.append(
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Path
-from git import GitCommandError
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
 
 from ..models.request_schemas import MergeRequest
 from ..models.response_schemas import MergeResponse, OkResponse, PushResponse
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.repo_manager import repo_manager
+from ..services.ssh_pool import SSHPoolBusyError
+from ..utils.lazy import lazy_import
+
+git = lazy_import("git")
 
 router = APIRouter()
 
 
-@router.post("/repo/{repo_id}/push", response_model=PushResponse)
+def _ssh_busy(exc: SSHPoolBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@router.post("/repo/{repoId}/push", response_model=PushResponse)
 def push(
     repo_id: str = Path(..., alias="repoId"),
     current_user: str = Depends(get_current_user),
@@ -20,7 +33,9 @@ def push(
     repo = repo_manager.get_repo(repo_id)
     try:
         pushed = repo.push()
-    except (GitCommandError, ValueError) as exc:
+    except SSHPoolBusyError as exc:
+        raise _ssh_busy(exc) from exc
+    except (git.GitCommandError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -32,7 +47,7 @@ def push(
     return PushResponse(ok=True, pushed=pushed)
 
 
-@router.post("/repo/{repo_id}/fetch", response_model=OkResponse)
+@router.post("/repo/{repoId}/fetch", response_model=OkResponse)
 def fetch(
     repo_id: str = Path(..., alias="repoId"),
     current_user: str = Depends(get_current_user),
@@ -40,7 +55,9 @@ def fetch(
     repo = repo_manager.get_repo(repo_id)
     try:
         repo.fetch()
-    except (GitCommandError, ValueError) as exc:
+    except SSHPoolBusyError as exc:
+        raise _ssh_busy(exc) from exc
+    except (git.GitCommandError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -51,7 +68,7 @@ def fetch(
     return OkResponse()
 
 
-@router.post("/repo/{repo_id}/merge", response_model=MergeResponse)
+@router.post("/repo/{repoId}/merge", response_model=MergeResponse)
 def merge_or_rebase(
     payload: MergeRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -60,7 +77,7 @@ def merge_or_rebase(
     repo = repo_manager.get_repo(repo_id)
     try:
         result = repo.merge_or_rebase(payload.fromBranch, payload.strategy)
-    except GitCommandError as exc:
+    except git.GitCommandError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
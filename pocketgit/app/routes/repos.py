@@ -1,16 +1,38 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from ..models.response_schemas import RepoSummary
 from ..services.auth_service import get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..services.repo_summaries import SUMMARY_FIELDS
 
 router = APIRouter()
 
 
-@router.get("/repos", response_model=list[RepoSummary])
-def list_repositories(current_user: str | None = Depends(get_optional_current_user)) -> list[RepoSummary]:
-    repos = repo_manager.list_repositories()
-    summaries = [RepoSummary(**repo.get_summary()) for repo in repos]
-    return summaries
+def _parse_fields(fields: Optional[str]) -> Optional[set[str]]:
+    if fields is None:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(SUMMARY_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return selected
+
+
+@router.get("/repos", response_model=list[RepoSummary], response_model_exclude_unset=True)
+def list_repositories(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of summary fields"),
+    current_user: str | None = Depends(get_optional_current_user),
+) -> list[RepoSummary]:
+    total, summaries = repo_manager.list_summaries(offset=offset, limit=limit, fields=_parse_fields(fields))
+    response.headers["X-Total-Count"] = str(total)
+    return [RepoSummary(**summary) for summary in summaries]
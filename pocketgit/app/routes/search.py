@@ -1,21 +1,30 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
 from typing import Optional
 
-from ..models.response_schemas import SearchResponse, SearchResult
+from ..models.response_schemas import SearchResponse
 from ..services.auth_service import get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..utils import conditional
+from ..utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
 
-@router.get("/repo/{repo_id}/search", response_model=SearchResponse)
+@router.get("/repo/{repoId}/search", response_model=SearchResponse)
 def search(
+    request: Request,
     repo_id: str = Path(..., alias="repoId"),
     q: str = Query(..., min_length=1),
     current_user: Optional[str] = Depends(get_optional_current_user),
-) -> SearchResponse:
+) -> Response:
     repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("search", q)
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     results = repo.search(q)
-    return SearchResponse(results=[SearchResult(**result) for result in results])
+    response = FastJSONResponse({"results": results})
+    conditional.tag(response, etag)
+    return response
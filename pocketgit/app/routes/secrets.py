@@ -22,7 +22,7 @@ def _get_repo(repo_id: str):
         raise
 
 
-@router.get("/repo/{repo_id}/secrets", response_model=SecretListResponse)
+@router.get("/repo/{repoId}/secrets", response_model=SecretListResponse)
 def list_secrets(
     repo_id: str = Path(..., alias="repoId"),
     current_user: str = Depends(get_current_user),
@@ -33,7 +33,7 @@ def list_secrets(
     return SecretListResponse(secrets=entries)
 
 
-@router.post("/repo/{repo_id}/secrets", response_model=OkResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/repo/{repoId}/secrets", response_model=OkResponse, status_code=status.HTTP_201_CREATED)
 def create_secret(
     payload: SecretCreateRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -48,7 +48,7 @@ def create_secret(
     return OkResponse(ok=True)
 
 
-@router.delete("/repo/{repo_id}/secrets", response_model=OkResponse)
+@router.delete("/repo/{repoId}/secrets", response_model=OkResponse)
 def delete_secret(
     payload: SecretDeleteRequest,
     repo_id: str = Path(..., alias="repoId"),
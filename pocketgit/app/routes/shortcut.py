@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from git import GitCommandError
 
 from ..services.activity_log import activity_logger
 from ..services.auth_service import get_current_user
 from ..services.repo_manager import repo_manager
+from ..utils.lazy import lazy_import
+
+git = lazy_import("git")
 
 
 router = APIRouter()
@@ -19,7 +21,7 @@ def shortcut_push(
     repo = repo_manager.get_repo(repo_id)
     try:
         pushed = repo.push()
-    except (GitCommandError, ValueError) as exc:
+    except (git.GitCommandError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -39,7 +41,7 @@ def shortcut_fetch(
     repo = repo_manager.get_repo(repo_id)
     try:
         repo.fetch()
-    except (GitCommandError, ValueError) as exc:
+    except (git.GitCommandError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
@@ -70,7 +72,7 @@ def shortcut_commit_and_push(
         pushed = repo.push()
     except HTTPException:
         raise
-    except (GitCommandError, ValueError) as exc:
+    except (git.GitCommandError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     activity_logger.append(
         repo_id,
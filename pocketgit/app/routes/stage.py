@@ -12,7 +12,7 @@ from ..utils.fs_utils import InvalidPathError
 router = APIRouter()
 
 
-@router.post("/repo/{repo_id}/stage", response_model=OkResponse)
+@router.post("/repo/{repoId}/stage", response_model=OkResponse)
 def stage_files(
     payload: StageRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -33,7 +33,7 @@ def stage_files(
     return OkResponse()
 
 
-@router.post("/repo/{repo_id}/unstage", response_model=OkResponse)
+@router.post("/repo/{repoId}/unstage", response_model=OkResponse)
 def unstage_files(
     payload: StageRequest,
     repo_id: str = Path(..., alias="repoId"),
@@ -1,37 +1,55 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Path
-from typing import Optional
+from fastapi import APIRouter, Depends, Path, Request, Response
+from typing import Optional, Union
 
-from ..models.response_schemas import DiffResponse, StatusEntry, StatusResponse
+from ..models.response_schemas import DiffResponse, StatusResponse
 from ..services.auth_service import get_optional_current_user
 from ..services.repo_manager import repo_manager
+from ..utils import conditional
+from ..utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
 
-@router.get("/repo/{repo_id}/status", response_model=StatusResponse)
+@router.get("/repo/{repoId}/status", response_model=StatusResponse)
 def get_status(
+    request: Request,
     repo_id: str = Path(..., alias="repoId"),
     current_user: Optional[str] = Depends(get_optional_current_user),
-) -> StatusResponse:
+) -> Response:
     repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("status")
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     data = repo.get_status()
-    return StatusResponse(
-        branch=data["branch"],
-        staged=[StatusEntry(**entry) for entry in data["staged"]],
-        unstaged=[StatusEntry(**entry) for entry in data["unstaged"]],
-        untracked=[StatusEntry(**entry) for entry in data["untracked"]],
-        ahead=data["ahead"],
-        behind=data["behind"],
+    response = FastJSONResponse(
+        {
+            "branch": data["branch"],
+            "staged": data["staged"],
+            "unstaged": data["unstaged"],
+            "untracked": data["untracked"],
+            "ahead": data["ahead"],
+            "behind": data["behind"],
+        }
     )
+    conditional.tag(response, etag)
+    return response
 
 
-@router.get("/repo/{repo_id}/diff", response_model=DiffResponse)
+@router.get("/repo/{repoId}/diff", response_model=DiffResponse)
 def get_diff(
+    request: Request,
+    response: Response,
     repo_id: str = Path(..., alias="repoId"),
     current_user: Optional[str] = Depends(get_optional_current_user),
-) -> DiffResponse:
+) -> Union[DiffResponse, Response]:
     repo = repo_manager.get_repo(repo_id)
+    etag = repo.state_validator("diff")
+    cached = conditional.not_modified(request, etag)
+    if cached is not None:
+        return cached
     diff = repo.get_diff()
+    conditional.tag(response, etag)
     return DiffResponse(diff=diff)
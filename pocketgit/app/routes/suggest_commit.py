@@ -151,7 +151,7 @@ def _build_summary(paths: List[str], categories: Set[str], change_types: Set[str
     return base
 
 
-@router.post("/repo/{repo_id}/suggest-commit-message")
+@router.post("/repo/{repoId}/suggest-commit-message")
 def suggest_commit_message(
     repo_id: str = FastAPIPath(..., alias="repoId"),
     current_user: str | None = Depends(get_optional_current_user),
@@ -1,9 +1,42 @@
 from __future__ import annotations
 
+import heapq
 import json
+import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _parse_ts(value: Any) -> float:
+    if not isinstance(value, str) or not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def iter_lines_reversed(path: Path, block_size: int = 4096) -> Iterator[bytes]:
+    """Yield the lines of a file from last to first, reading fixed-size blocks from the tail."""
+
+    with path.open("rb") as handle:
+        handle.seek(0, os.SEEK_END)
+        position = handle.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            handle.seek(position)
+            chunk = handle.read(read_size) + remainder
+            lines = chunk.split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if remainder.strip():
+            yield remainder
 
 
 class ActivityLogger:
@@ -11,6 +44,8 @@ class ActivityLogger:
 
     def __init__(self, base_path: Path):
         self.base_path = base_path
+        self._head_index: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._head_lock = threading.Lock()
 
     def _log_path(self, repo_id: str) -> Path:
         repo_path = self.base_path / repo_id
@@ -41,6 +76,15 @@ class ActivityLogger:
             handle.write(json.dumps(entry, ensure_ascii=False))
             handle.write("\n")
 
+    def stamp(self, repo_id: str) -> Optional[Tuple[int, int]]:
+        """Return the log's (size, mtime) pair, which changes with every append, or ``None`` without a log."""
+
+        try:
+            stat = (self.base_path / repo_id / self.LOG_FILENAME).stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
     def read(self, repo_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         path = self._log_path(repo_id)
         if not path.exists():
@@ -60,6 +104,101 @@ class ActivityLogger:
             return entries[-limit:]
         return entries
 
+    def iter_newest_first(self, repo_id: str) -> Iterator[Dict[str, Any]]:
+        path = self.base_path / repo_id / self.LOG_FILENAME
+        try:
+            lines = iter_lines_reversed(path)
+            for line in lines:
+                try:
+                    payload = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(payload, dict):
+                    yield payload
+        except FileNotFoundError:
+            return
+
+    def _head_timestamp(self, repo_id: str) -> Optional[float]:
+        stamp = self.stamp(repo_id)
+        if stamp is None:
+            return None
+        with self._head_lock:
+            cached = self._head_index.get(repo_id)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        head = next(self.iter_newest_first(repo_id), None)
+        if head is None:
+            return None
+        head_ts = _parse_ts(head.get("ts"))
+        with self._head_lock:
+            self._head_index[repo_id] = (stamp, head_ts)
+        return head_ts
+
+    def _repo_ids(self) -> List[str]:
+        if not self.base_path.exists():
+            return []
+        return sorted(entry.name for entry in self.base_path.iterdir() if entry.is_dir())
+
+    def iter_all(
+        self,
+        repo_ids: Optional[Iterable[str]] = None,
+        before: Optional[str] = None,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Merge every repository log newest first.
+
+        Logs are only opened once their cached head timestamp reaches the top of
+        the heap, so short feeds never touch repositories with older activity.
+        """
+
+        before_ts = _parse_ts(before) if before else None
+        heap: List[Tuple[float, str, int, Optional[Dict[str, Any]], Optional[Iterator[Dict[str, Any]]]]] = []
+        for repo_id in dict.fromkeys(repo_ids) if repo_ids is not None else self._repo_ids():
+            head_ts = self._head_timestamp(repo_id)
+            if head_ts is None:
+                continue
+            heap.append((-head_ts, repo_id, 0, None, None))
+        heapq.heapify(heap)
+
+        while heap:
+            _, repo_id, sequence, entry, events = heapq.heappop(heap)
+            if events is None:
+                events = self.iter_newest_first(repo_id)
+            else:
+                if before_ts is None or _parse_ts(entry.get("ts")) < before_ts:
+                    yield repo_id, entry
+            following = next(events, None)
+            if following is not None:
+                heapq.heappush(heap, (-_parse_ts(following.get("ts")), repo_id, sequence + 1, following, events))
+
+    def read_all(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        repo_ids: Optional[Iterable[str]] = None,
+        actions: Optional[Iterable[str]] = None,
+        user: Optional[str] = None,
+        since: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        action_filter = set(actions) if actions else None
+        since_ts = _parse_ts(since) if since else None
+        results: List[Tuple[str, Dict[str, Any]]] = []
+        skipped = 0
+        for repo_id, entry in self.iter_all(repo_ids=repo_ids, before=before):
+            if since_ts is not None and _parse_ts(entry.get("ts")) < since_ts:
+                break
+            if action_filter is not None and entry.get("action") not in action_filter:
+                continue
+            if user is not None and entry.get("user") != user:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            results.append((repo_id, entry))
+            if len(results) >= limit:
+                break
+        return results
+
 
 repos_base_path = Path(__file__).resolve().parent.parent.parent / "repos"
 activity_logger = ActivityLogger(repos_base_path)
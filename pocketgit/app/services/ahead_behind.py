@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from ..utils.git_cmd import run_git
+from ..utils.git_refs import common_git_dir, resolve_git_dir
+from ..utils.lru import LRUCache
+from ..utils.metrics import track_cache, track_executor
+
+TRACK_PATTERN = re.compile(r"(ahead|behind) (\d+)")
+
+
+@dataclass
+class BranchDivergence:
+    branch: str
+    oid: str
+    upstream: Optional[str]
+    upstream_oid: Optional[str]
+    ahead: int = 0
+    behind: int = 0
+
+
+def parse_track(value: str) -> Tuple[int, int]:
+    """Parse ``%(upstream:track,nobracket)`` output such as ``ahead 2, behind 1``."""
+
+    counts = {"ahead": 0, "behind": 0}
+    for kind, number in TRACK_PATTERN.findall(value):
+        counts[kind] = int(number)
+    return counts["ahead"], counts["behind"]
+
+
+class AheadBehindService:
+    """Ahead/behind counts cached by ``(local OID, upstream OID)``; the pair fully determines the answer."""
+
+    CACHE_SIZE = int(os.getenv("POCKETGIT_AHEAD_BEHIND_CACHE_SIZE", "4096"))
+    MAX_REF_ARGS = 256
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self._cache: LRUCache[Tuple[str, str], Tuple[int, int]] = LRUCache(cache_size or self.CACHE_SIZE)
+        self._graph_checked: Set[Path] = set()
+        self._graph_lock = threading.Lock()
+        self._graph_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pocketgit-commit-graph")
+        track_cache("ahead_behind", self._cache)
+        track_executor("commit_graph", self._graph_executor)
+
+    @staticmethod
+    def _has_commit_graph(common_dir: Path) -> bool:
+        info = common_dir / "objects" / "info"
+        return (info / "commit-graph").exists() or (info / "commit-graphs" / "commit-graph-chain").exists()
+
+    @staticmethod
+    def _write_commit_graph(repo_path: Path) -> None:
+        try:
+            run_git(repo_path, ["commit-graph", "write", "--reachable", "--changed-paths"])
+        except (OSError, subprocess.CalledProcessError):
+            pass
+
+    def ensure_commit_graph(self, repo_path: Path) -> None:
+        """Schedule a background commit-graph write for repositories that lack one.
+
+        rev-list and for-each-ref pick the graph up automatically and use its generation
+        numbers to stop walking once both sides are known, which keeps deep histories cheap.
+        """
+
+        git_dir = resolve_git_dir(repo_path)
+        if git_dir is None:
+            return
+        common_dir = common_git_dir(git_dir)
+        with self._graph_lock:
+            if common_dir in self._graph_checked:
+                return
+            self._graph_checked.add(common_dir)
+        if not self._has_commit_graph(common_dir):
+            self._graph_executor.submit(self._write_commit_graph, repo_path)
+
+    def counts(self, repo_path: Path, local_oid: str, upstream_oid: str) -> Tuple[int, int]:
+        if local_oid == upstream_oid:
+            return 0, 0
+        key = (local_oid, upstream_oid)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        self.ensure_commit_graph(repo_path)
+        output = run_git(repo_path, ["rev-list", "--left-right", "--count", f"{upstream_oid}...{local_oid}"])
+        behind_str, ahead_str = output.split()
+        result = (int(ahead_str), int(behind_str))
+        self._cache.set(key, result)
+        return result
+
+    def fill(self, repo_path: Path, entries: Iterable[BranchDivergence]) -> None:
+        """Set ahead/behind on each entry from the cache, computing all misses in one ``for-each-ref``."""
+
+        missing: Dict[str, BranchDivergence] = {}
+        for entry in entries:
+            if not entry.upstream_oid or entry.upstream_oid == entry.oid:
+                continue
+            cached = self._cache.get((entry.oid, entry.upstream_oid))
+            if cached is not None:
+                entry.ahead, entry.behind = cached
+            else:
+                missing[f"refs/heads/{entry.branch}"] = entry
+        if not missing:
+            return
+        self.ensure_commit_graph(repo_path)
+        output = run_git(
+            repo_path,
+            [
+                "for-each-ref",
+                "--format=%(refname)%00%(upstream:track,nobracket)",
+                *(missing if len(missing) <= self.MAX_REF_ARGS else ["refs/heads"]),
+            ],
+        )
+        for line in output.splitlines():
+            refname, _, track = line.partition("\0")
+            entry = missing.get(refname)
+            if entry is None:
+                continue
+            entry.ahead, entry.behind = parse_track(track)
+            self._cache.set((entry.oid, entry.upstream_oid), (entry.ahead, entry.behind))
+
+
+ahead_behind_service = AheadBehindService()
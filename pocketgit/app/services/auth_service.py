@@ -1,33 +1,133 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple, TypeVar
 
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from passlib.context import CryptContext
+
+from ..utils.fs_utils import atomic_write_text, file_lock
+from ..utils.lazy import lazy_import, lazy_service
+from ..utils.lru import LRUCache
+from ..utils.metrics import track_cache, track_executor
+from .metadata_store import MetadataStore, metadata_store
+
+jwt = lazy_import("jwt")
+passlib_context = lazy_import("passlib.context")
+
+T = TypeVar("T")
+
+
+class AuthThrottledError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Too many failed login attempts")
+        self.retry_after = retry_after
+
+
+class AuthBusyError(Exception):
+    pass
+
+
+class LoginThrottle:
+    def __init__(self, max_failures: int, window_seconds: float, lockout_seconds: float, max_keys: int = 10000):
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.max_keys = max_keys
+        self._failures: Dict[str, Deque[float]] = {}
+        self._locked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def check(self, keys: Iterable[str]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            retry_after = 0.0
+            for key in keys:
+                until = self._locked_until.get(key)
+                if until is None:
+                    continue
+                if until <= now:
+                    self._locked_until.pop(key, None)
+                    continue
+                retry_after = max(retry_after, until - now)
+            return retry_after
+
+    def record_failure(self, keys: Iterable[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) > self.max_keys:
+                self._prune(now)
+            for key in keys:
+                attempts = self._failures.setdefault(key, deque())
+                attempts.append(now)
+                while attempts and attempts[0] < now - self.window_seconds:
+                    attempts.popleft()
+                if len(attempts) >= self.max_failures:
+                    self._locked_until[key] = now + self.lockout_seconds
+                    attempts.clear()
+
+    def reset(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._failures.pop(key, None)
+                self._locked_until.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, attempts in self._failures.items() if not attempts or attempts[-1] < now - self.window_seconds]:
+            del self._failures[key]
+        for key in [key for key, until in self._locked_until.items() if until <= now]:
+            del self._locked_until[key]
 
 
 class AuthService:
     JWT_ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 12
+    TOKEN_CACHE_SIZE = 1024
+    TOKEN_CACHE_EXPIRY_MARGIN_SECONDS = 30
+    BCRYPT_WORKERS = int(os.getenv("POCKETGIT_BCRYPT_WORKERS", "2"))
+    BCRYPT_MAX_PENDING = int(os.getenv("POCKETGIT_BCRYPT_MAX_PENDING", "16"))
+    LOGIN_MAX_FAILURES = int(os.getenv("POCKETGIT_LOGIN_MAX_FAILURES", "5"))
+    LOGIN_FAILURE_WINDOW_SECONDS = 300
+    LOGIN_LOCKOUT_SECONDS = 300
 
-    def __init__(self, users_path: Path):
+    def __init__(self, users_path: Path, store: Optional[MetadataStore] = None):
         self.users_path = users_path
+        self.store = store
         self.users_path.parent.mkdir(parents=True, exist_ok=True)
         if not self.users_path.exists():
             self.users_path.write_text("{}", encoding="utf-8")
-        self._pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self._pwd_context = passlib_context.CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self._users_lock = threading.Lock()
+        self._users_cache: Dict[str, str] = {}
+        self._users_stamp: Optional[Tuple[int, int, int]] = None
+        self._token_cache: LRUCache[str, Tuple[str, float]] = LRUCache(self.TOKEN_CACHE_SIZE)
+        self._hash_executor = ThreadPoolExecutor(max_workers=self.BCRYPT_WORKERS, thread_name_prefix="pocketgit-bcrypt")
+        self._hash_slots = threading.BoundedSemaphore(self.BCRYPT_MAX_PENDING)
+        track_cache("auth_token", self._token_cache)
+        track_executor("bcrypt", self._hash_executor)
+        self._login_throttle = LoginThrottle(
+            self.LOGIN_MAX_FAILURES,
+            self.LOGIN_FAILURE_WINDOW_SECONDS,
+            self.LOGIN_LOCKOUT_SECONDS,
+        )
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.users_path.with_name(self.users_path.name + ".lock")
 
     @property
     def jwt_secret(self) -> str:
         return os.getenv("POCKETGIT_JWT_SECRET", "pocketgit-dev-secret")
 
-    def _load_users(self) -> Dict[str, str]:
+    def _read_users_file(self) -> Dict[str, str]:
         try:
             raw = self.users_path.read_text(encoding="utf-8")
             if not raw.strip():
@@ -39,32 +139,122 @@ class AuthService:
         except (OSError, json.JSONDecodeError):
             return {}
 
+    def _users_file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.users_path.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _cached_users(self) -> Dict[str, str]:
+        # The returned mapping is shared and must be treated as read-only. One stat per call keeps
+        # users added or changed by another worker visible at once.
+        stamp = self._users_file_stamp()
+        with self._users_lock:
+            if stamp is not None and stamp == self._users_stamp:
+                return self._users_cache
+            users = self._read_users_file()
+            self._users_cache = users
+            self._users_stamp = stamp
+            return users
+
     def _save_users(self, users: Dict[str, str]) -> None:
         payload = json.dumps(users, indent=2, sort_keys=True)
-        self.users_path.write_text(payload, encoding="utf-8")
+        atomic_write_text(self.users_path, payload)
+        with self._users_lock:
+            self._users_cache = dict(users)
+            self._users_stamp = self._users_file_stamp()
 
-    def create_user(self, username: str, password: str) -> None:
+    def _normalize_new_user(self, username: str, password: str) -> str:
         username = username.strip()
         if not username:
             raise ValueError("Username is required")
         if not password:
             raise ValueError("Password is required")
-        users = self._load_users()
-        if username in users:
+        if self.user_exists(username):
             raise ValueError("User already exists")
-        users[username] = self._pwd_context.hash(password)
-        self._save_users(users)
+        return username
+
+    def _get_password_hash(self, username: str) -> Optional[str]:
+        if self.store is not None:
+            return self.store.get_user_hash(username)
+        return self._cached_users().get(username)
+
+    def _store_user(self, username: str, hashed: str) -> None:
+        if self.store is not None:
+            if not self.store.add_user(username, hashed):
+                raise ValueError("User already exists")
+            return
+        with file_lock(self._lock_path):
+            users = self._read_users_file()
+            if username in users:
+                raise ValueError("User already exists")
+            users[username] = hashed
+            self._save_users(users)
+
+    def create_user(self, username: str, password: str) -> None:
+        username = self._normalize_new_user(username, password)
+        self._store_user(username, self._pwd_context.hash(password))
+
+    async def create_user_async(self, username: str, password: str) -> None:
+        username = self._normalize_new_user(username, password)
+        hashed = await self._run_password_task(self._pwd_context.hash, password)
+        # Storing takes the users file lock and fsyncs, so it stays off the event loop as well.
+        await asyncio.to_thread(self._store_user, username, hashed)
+
+    def delete_user(self, username: str) -> bool:
+        if self.store is not None:
+            if not self.store.delete_user(username):
+                return False
+        else:
+            with file_lock(self._lock_path):
+                users = self._read_users_file()
+                if username not in users:
+                    return False
+                users.pop(username)
+                self._save_users(users)
+        self.revoke_user(username)
+        return True
 
     def authenticate_user(self, username: str, password: str) -> bool:
-        users = self._load_users()
-        stored = users.get(username)
+        stored = self._get_password_hash(username)
         if not stored:
             return False
         return self._pwd_context.verify(password, stored)
 
+    async def authenticate_user_async(self, username: str, password: str, client: Optional[str] = None) -> bool:
+        keys = [f"user:{username}"]
+        if client:
+            keys.append(f"ip:{client}")
+        retry_after = self._login_throttle.check(keys)
+        if retry_after:
+            raise AuthThrottledError(retry_after)
+        stored = self._get_password_hash(username)
+        if stored:
+            verified = await self._run_password_task(self._pwd_context.verify, password, stored)
+        else:
+            verified = False
+        if verified:
+            self._login_throttle.reset(keys[:1])
+        else:
+            self._login_throttle.record_failure(keys)
+        return verified
+
+    async def _run_password_task(self, func: Callable[..., T], *args: Any) -> T:
+        if not self._hash_slots.acquire(blocking=False):
+            raise AuthBusyError("Too many concurrent authentication requests")
+        try:
+            future = self._hash_executor.submit(func, *args)
+        except BaseException:
+            self._hash_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._hash_slots.release())
+        return await asyncio.wrap_future(future)
+
     def user_exists(self, username: str) -> bool:
-        users = self._load_users()
-        return username in users
+        if self.store is not None:
+            return self.store.user_exists(username)
+        return username in self._cached_users()
 
     def create_access_token(self, username: str, expires_delta: Optional[timedelta] = None) -> str:
         expire_delta = expires_delta or timedelta(minutes=self.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -73,6 +263,14 @@ class AuthService:
         return jwt.encode(payload, self.jwt_secret, algorithm=self.JWT_ALGORITHM)
 
     def verify_token(self, token: str) -> Optional[str]:
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            username, valid_until = cached
+            if time.time() < valid_until and self.user_exists(username):
+                return username
+            self._token_cache.pop(token)
+            if time.time() < valid_until:
+                return None
         try:
             payload = jwt.decode(token, self.jwt_secret, algorithms=[self.JWT_ALGORITHM])
         except jwt.PyJWTError:
@@ -82,11 +280,17 @@ class AuthService:
             return None
         if not self.user_exists(username):
             return None
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            self._token_cache.set(token, (str(username), float(expires_at) - self.TOKEN_CACHE_EXPIRY_MARGIN_SECONDS))
         return str(username)
 
+    def revoke_user(self, username: str) -> None:
+        self._token_cache.discard_where(lambda _, value: value[0] == username)
+
 
 users_path = Path(__file__).resolve().parent.parent.parent / "auth" / "users.json"
-auth_service = AuthService(users_path)
+auth_service = lazy_service(lambda: AuthService(users_path, metadata_store))
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..utils.fs_utils import atomic_write_text
+from ..utils.git_cmd import GitCall, run_git
+from ..utils.git_refs import common_git_dir, resolve_git_dir
+from ..utils.lru import LRUCache
+from ..utils.metrics import count_streamed_git_command, track_cache
+
+COMMIT_HEADER_FIELDS = {
+    "author": "author",
+    "author-mail": "authorMail",
+    "author-time": "authorTime",
+    "committer": "committer",
+    "committer-time": "committerTime",
+    "summary": "summary",
+}
+
+
+def parse_incremental(lines: Iterator[str]) -> Iterator[dict]:
+    """Turn ``git blame --incremental`` output into hunks as soon as each one is complete."""
+
+    commits: Dict[str, Dict[str, object]] = {}
+    hunk: Optional[dict] = None
+    for raw_line in lines:
+        line = raw_line.rstrip("\n")
+        if hunk is None:
+            parts = line.split()
+            if len(parts) != 4:
+                continue
+            oid, orig_line, final_line, count = parts
+            hunk = {"oid": oid, "origLine": int(orig_line), "finalLine": int(final_line), "lines": int(count)}
+            continue
+        key, _, value = line.partition(" ")
+        if key == "filename":
+            hunk["path"] = value
+            hunk.update(commits.setdefault(hunk["oid"], {}))
+            yield hunk
+            hunk = None
+        elif key in COMMIT_HEADER_FIELDS:
+            field = COMMIT_HEADER_FIELDS[key]
+            parsed: object = int(value) if field.endswith("Time") and value.isdigit() else value
+            commits.setdefault(hunk["oid"], {})[field] = parsed
+        elif key == "boundary":
+            commits.setdefault(hunk["oid"], {})["boundary"] = True
+
+
+def _metered(lines: Iterator[str], call: GitCall) -> Iterator[str]:
+    for line in lines:
+        call.bytes_out += len(line.encode("utf-8"))
+        yield line
+
+
+class BlameService:
+    """Blame hunks for a (commit OID, path) pair, which never change once computed.
+
+    Results are kept in memory and under ``.git/pocketgit/blame`` so a repeat request is a file read.
+    """
+
+    CACHE_SIZE = int(os.getenv("POCKETGIT_BLAME_CACHE_SIZE", "64"))
+    DISK_ENTRIES = int(os.getenv("POCKETGIT_BLAME_DISK_ENTRIES", "2000"))
+
+    def __init__(self):
+        self._cache: LRUCache[Tuple[str, str, str], List[dict]] = LRUCache(self.CACHE_SIZE)
+        track_cache("blame", self._cache)
+
+    @staticmethod
+    def _cache_dir(repo_path: Path) -> Optional[Path]:
+        git_dir = resolve_git_dir(repo_path)
+        if git_dir is None:
+            return None
+        return common_git_dir(git_dir) / "pocketgit" / "blame"
+
+    def _cache_file(self, repo_path: Path, oid: str, path: str) -> Optional[Path]:
+        cache_dir = self._cache_dir(repo_path)
+        if cache_dir is None:
+            return None
+        digest = hashlib.sha1(f"{oid}\0{path}".encode("utf-8")).hexdigest()
+        return cache_dir / f"{digest}.ndjson"
+
+    def _load(self, repo_path: Path, oid: str, path: str) -> Optional[List[dict]]:
+        key = (str(repo_path), oid, path)
+        hunks = self._cache.get(key)
+        if hunks is not None:
+            return hunks
+        cache_file = self._cache_file(repo_path, oid, path)
+        if cache_file is None:
+            return None
+        try:
+            content = cache_file.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        try:
+            hunks = [json.loads(line) for line in content.splitlines() if line]
+        except json.JSONDecodeError:
+            return None
+        self._cache.set(key, hunks)
+        return hunks
+
+    def _store(self, repo_path: Path, oid: str, path: str, hunks: List[dict]) -> None:
+        self._cache.set((str(repo_path), oid, path), hunks)
+        cache_file = self._cache_file(repo_path, oid, path)
+        if cache_file is None:
+            return
+        try:
+            atomic_write_text(cache_file, "".join(json.dumps(hunk) + "\n" for hunk in hunks))
+            self._trim(cache_file.parent)
+        except OSError:
+            pass
+
+    def _trim(self, cache_dir: Path) -> None:
+        entries = list(cache_dir.glob("*.ndjson"))
+        if len(entries) <= self.DISK_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[: len(entries) - self.DISK_ENTRIES]:
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def check_path(repo_path: Path, oid: str, path: str) -> None:
+        try:
+            object_type = run_git(repo_path, ["cat-file", "-t", f"{oid}:{path}"]).strip()
+        except subprocess.CalledProcessError as exc:
+            raise FileNotFoundError(path) from exc
+        if object_type != "blob":
+            raise FileNotFoundError(path)
+
+    def stream(self, repo_path: Path, oid: str, path: str) -> Iterator[dict]:
+        """Yield hunks from the cache, or from a live ``git blame --incremental`` run that is cached on success."""
+
+        cached = self._load(repo_path, oid, path)
+        if cached is not None:
+            yield from cached
+            return
+        args = ["git", "blame", "--incremental", oid, "--", path]
+        count_streamed_git_command(args)
+        call = GitCall(args, repo_path, streamed=True)
+        call.bytes_out = 0
+        try:
+            process = subprocess.Popen(
+                args,
+                cwd=repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except OSError as exc:
+            call.finish(exc)
+            raise
+        hunks: List[dict] = []
+        completed = False
+        try:
+            for hunk in parse_incremental(_metered(process.stdout, call)):
+                hunks.append(hunk)
+                yield hunk
+            completed = process.wait() == 0
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            call.exit_code = process.wait()
+            call.finish()
+        if completed:
+            self._store(repo_path, oid, path, hunks)
+
+
+blame_service = BlameService()
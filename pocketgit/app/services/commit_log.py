@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.git_cmd import GitCall, run_git
+from ..utils.metrics import count_streamed_git_command
+from .ahead_behind import ahead_behind_service
+
+LOG_FIELDS = (
+    "oid",
+    "parents",
+    "authorName",
+    "authorEmail",
+    "authoredAt",
+    "committerName",
+    "committerEmail",
+    "committedAt",
+    "subject",
+)
+LOG_FORMAT = "%x1f".join(("%H", "%P", "%an", "%ae", "%aI", "%cn", "%ce", "%cI", "%s"))
+# With --name-only each commit is followed by its path; the marker tells the two kinds of record apart.
+FOLLOW_FORMAT = "%x1e" + LOG_FORMAT
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def parse_log_record(record: bytes) -> Optional[dict]:
+    values = record.decode("utf-8", errors="replace").lstrip("\n").lstrip("\x1e").split("\x1f")
+    if len(values) != len(LOG_FIELDS):
+        return None
+    commit = dict(zip(LOG_FIELDS, values))
+    commit["parents"] = commit["parents"].split()
+    return commit
+
+
+class LogWalk:
+    """A ``git log -z`` walk from a fixed commit, read incrementally and kept open between pages.
+
+    History below a commit never changes, so the commits read so far stay valid for as long as
+    the walk is cached. If the process is closed early it is restarted with ``--skip``.
+    """
+
+    def __init__(
+        self,
+        repo_path: Path,
+        start_oid: str,
+        path: Optional[str],
+        author: Optional[str],
+        follow: bool = False,
+    ):
+        self.repo_path = repo_path
+        self.start_oid = start_oid
+        self.path = path
+        self.author = author
+        self.follow = follow
+        self.commits: List[dict] = []
+        self.done = False
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self._process: Optional[subprocess.Popen] = None
+        self._call: Optional[GitCall] = None
+        self._pending = b""
+        self._current: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None
+
+    def _start(self) -> None:
+        args = ["git", "log", "-z"]
+        if self.follow:
+            args.extend([f"--format={FOLLOW_FORMAT}", "--follow", "--name-only"])
+        else:
+            args.append(f"--format={LOG_FORMAT}")
+        if self.commits:
+            args.append(f"--skip={len(self.commits)}")
+        if self.author:
+            args.append(f"--author={self.author}")
+        args.append(self.start_oid)
+        args.append("--")
+        if self.path:
+            args.append(self.path)
+        self._pending = b""
+        self._current = None
+        count_streamed_git_command(args)
+        call = GitCall(args, self.repo_path, streamed=True)
+        try:
+            self._process = subprocess.Popen(args, cwd=self.repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as exc:
+            call.finish(exc)
+            raise
+        call.bytes_out = 0
+        self._call = call
+
+    def fill(self, count: int) -> None:
+        """Read until at least ``count`` commits are known or the history is exhausted. Hold ``lock``."""
+
+        while len(self.commits) < count and not self.done:
+            if self._process is None:
+                self._start()
+            chunk = self._process.stdout.read1(READ_CHUNK_SIZE)
+            self._call.bytes_out += len(chunk)
+            if not chunk:
+                if self._pending:
+                    self._add_record(self._pending)
+                if self._current is not None:
+                    self.commits.append(self._current)
+                self.close()
+                self.done = True
+                break
+            *records, self._pending = (self._pending + chunk).split(b"\0")
+            for record in records:
+                self._add_record(record)
+
+    def _add_record(self, record: bytes) -> None:
+        if not self.follow:
+            commit = parse_log_record(record)
+            if commit:
+                self.commits.append(commit)
+            return
+        if record.lstrip(b"\n").startswith(b"\x1e"):
+            if self._current is not None:
+                self.commits.append(self._current)
+            self._current = parse_log_record(record)
+        elif self._current is not None and record.strip():
+            self._current["path"] = record.decode("utf-8", errors="replace").strip("\n")
+            self.commits.append(self._current)
+            self._current = None
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        call, self._call = self._call, None
+        self._pending = b""
+        self._current = None
+        if process is None:
+            return
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        call.exit_code = process.wait()
+        call.finish()
+
+
+class CommitLogService:
+    MAX_WALKS = int(os.getenv("POCKETGIT_LOG_CACHE_WALKS", "64"))
+    MAX_RUNNING_WALKS = 8
+    IDLE_SECONDS = 60.0
+    DEFAULT_PAGE_SIZE = 50
+
+    def __init__(self):
+        self._walks: "OrderedDict[Tuple[str, str, Optional[str], Optional[str], bool], LogWalk]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[str, int]:
+        oid, _, offset = cursor.partition(":")
+        if len(oid) not in (40, 64) or not offset.isdigit() or any(ch not in "0123456789abcdef" for ch in oid):
+            raise ValueError("Invalid cursor")
+        return oid, int(offset)
+
+    @staticmethod
+    def resolve(repo_path: Path, ref: str) -> str:
+        try:
+            output = run_git(repo_path, ["rev-parse", "--verify", "--quiet", "--end-of-options", f"{ref}^{{commit}}"])
+        except subprocess.CalledProcessError as exc:
+            raise ValueError(f"Unknown revision: {ref}") from exc
+        return output.strip()
+
+    def _walk(
+        self,
+        repo_path: Path,
+        start_oid: str,
+        path: Optional[str],
+        author: Optional[str],
+        follow: bool,
+    ) -> LogWalk:
+        key = (str(repo_path), start_oid, path, author, follow)
+        evicted: List[LogWalk] = []
+        with self._lock:
+            walk = self._walks.get(key)
+            if walk is None:
+                walk = LogWalk(repo_path, start_oid, path, author, follow)
+                self._walks[key] = walk
+            self._walks.move_to_end(key)
+            walk.last_used = now = time.monotonic()
+            while len(self._walks) > self.MAX_WALKS:
+                evicted.append(self._walks.popitem(last=False)[1])
+            # Least recently used first; stop readers that sat idle or exceed the running cap.
+            running = [other for other in self._walks.values() if other.running and other is not walk]
+            excess = max(0, len(running) - self.MAX_RUNNING_WALKS + 1)
+            evicted.extend(
+                other for index, other in enumerate(running) if index < excess or now - other.last_used > self.IDLE_SECONDS
+            )
+        for other in evicted:
+            with other.lock:
+                other.close()
+        return walk
+
+    def page(
+        self,
+        repo_path: Path,
+        ref: str = "HEAD",
+        path: Optional[str] = None,
+        author: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        follow: bool = False,
+    ) -> Dict[str, object]:
+        if cursor:
+            start_oid, offset = self.parse_cursor(cursor)
+        else:
+            start_oid, offset = self.resolve(repo_path, ref), 0
+            ahead_behind_service.ensure_commit_graph(repo_path)
+        walk = self._walk(repo_path, start_oid, path or None, author or None, follow)
+        with walk.lock:
+            walk.fill(offset + limit + 1)
+            commits = walk.commits[offset : offset + limit]
+            has_more = len(walk.commits) > offset + limit
+        if walk.running:
+            self._ensure_reaper()
+        return {
+            "commits": [dict(commit, parents=list(commit["parents"])) for commit in commits],
+            "nextCursor": f"{start_oid}:{offset + limit}" if has_more else None,
+        }
+
+    def reap_idle(self) -> None:
+        """Stop readers idle for longer than ``IDLE_SECONDS``; walks being read right now are left alone."""
+
+        now = time.monotonic()
+        with self._lock:
+            idle = [walk for walk in self._walks.values() if walk.running and now - walk.last_used > self.IDLE_SECONDS]
+        for walk in idle:
+            if walk.lock.acquire(blocking=False):
+                try:
+                    walk.close()
+                finally:
+                    walk.lock.release()
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None or self._stop.is_set():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="pocketgit-log-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        # Runs only while some walk holds a git process, so an idle server keeps no thread around.
+        while not self._stop.wait(self.IDLE_SECONDS / 2):
+            self.reap_idle()
+            with self._lock:
+                if not any(walk.running for walk in self._walks.values()):
+                    self._reaper = None
+                    return
+
+    def close_all(self) -> None:
+        """Stop every reader and the reaper thread; called on shutdown."""
+
+        self._stop.set()
+        with self._lock:
+            walks = list(self._walks.values())
+            self._walks.clear()
+            reaper, self._reaper = self._reaper, None
+        for walk in walks:
+            with walk.lock:
+                walk.close()
+        if reaper is not None:
+            reaper.join()
+        self._stop.clear()
+
+
+commit_log_service = CommitLogService()
@@ -5,17 +5,82 @@ import fnmatch
 import json
 import os
 import subprocess
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlparse, urlunparse
 
-from git import Actor, GitCommandError, Repo
-
+from ..utils import conditional
 from ..utils.diff_utils import combine_diffs
-from ..utils.fs_utils import InvalidPathError, ensure_within_repo
+from ..utils.fs_utils import InvalidPathError, atomic_write_text, ensure_within_repo
+from ..utils.git_cmd import run_git
+from ..utils.git_refs import read_tracking, resolve_git_dir
+from ..utils.lazy import lazy_import
+from ..utils.metrics import git_operation, track_cache
+from .ahead_behind import BranchDivergence, ahead_behind_service
+from .blame import blame_service
+from .commit_log import commit_log_service
+from .metadata_store import metadata_store
+from .repo_locks import repo_locks, repo_operation
+from .repo_profile import repo_profile_service
 from .secret_manager import secret_manager
 from .ssh_keys import ssh_key_manager
+from .worktrees import worktree_manager
+
+git = lazy_import("git")
+git_metered = lazy_import("..utils.git_metered", __package__)
+
+
+class MetadataFileCache:
+    """Parsed ``pocketgit.json`` contents keyed by path and validated against the file's stat."""
+
+    def __init__(self):
+        self._entries: Dict[Path, Tuple[Tuple[int, int, int], dict]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self, path: Path) -> Optional[dict]:
+        stamp = self._stamp(path)
+        if stamp is None:
+            self.invalidate(path)
+            return None
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached[0] == stamp:
+            self.hits += 1
+            return dict(cached[1])
+        self.misses += 1
+        data = json.loads(path.read_text())
+        with self._lock:
+            self._entries[path] = (stamp, data)
+        return dict(data)
+
+    def store(self, path: Path, data: dict) -> None:
+        stamp = self._stamp(path)
+        with self._lock:
+            if stamp is None:
+                self._entries.pop(path, None)
+            else:
+                self._entries[path] = (stamp, dict(data))
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+metadata_file_cache = MetadataFileCache()
+track_cache("metadata_file", metadata_file_cache)
 
 
 @dataclass
@@ -25,29 +90,74 @@ class RepoMetadata:
     default_branch: Optional[str]
     name: Optional[str] = None
     ssh_key_id: Optional[str] = None
+    profile: Optional[dict] = None
 
     @classmethod
-    def from_file(cls, path: Path, repo_id: str) -> "RepoMetadata | None":
-        if not path.exists():
-            return None
-        data = json.loads(path.read_text())
+    def from_dict(cls, data: dict, repo_id: str) -> "RepoMetadata":
         return cls(
             repo_id=repo_id,
             remote_url=data.get("remote"),
             default_branch=data.get("default_branch"),
             name=data.get("name"),
             ssh_key_id=data.get("ssh_key_id"),
+            profile=data.get("profile"),
         )
 
-    def to_file(self, path: Path) -> None:
-        payload = {
+    def to_dict(self) -> dict:
+        return {
             "repoId": self.repo_id,
             "remote": self.remote_url,
             "default_branch": self.default_branch,
             "name": self.name,
             "ssh_key_id": self.ssh_key_id,
+            "profile": self.profile,
         }
-        path.write_text(json.dumps(payload, indent=2))
+
+    @classmethod
+    def from_file(cls, path: Path, repo_id: str) -> "RepoMetadata | None":
+        if metadata_store is not None:
+            stored = metadata_store.get_repo_metadata(repo_id)
+            if stored is not None:
+                return cls.from_dict(stored, repo_id)
+        data = metadata_file_cache.load(path)
+        if data is None:
+            return None
+        return cls.from_dict(data, repo_id)
+
+    @classmethod
+    def load_many(cls, repo_ids: Iterable[str]) -> Dict[str, "RepoMetadata"]:
+        """Metadata found in the SQLite store for ``repo_ids``, read in one query; empty in JSON mode."""
+
+        if metadata_store is None:
+            return {}
+        stored = metadata_store.list_repo_metadata(repo_ids)
+        return {repo_id: cls.from_dict(data, repo_id) for repo_id, data in stored.items()}
+
+    @staticmethod
+    def versions(repo_ids: Iterable[str]) -> Dict[str, int]:
+        """Store-side versions of the metadata of ``repo_ids``, read in one query; empty in JSON mode."""
+
+        if metadata_store is None:
+            return {}
+        return metadata_store.list_repo_metadata_versions(repo_ids)
+
+    @staticmethod
+    def discard(repo_id: str) -> None:
+        """Drop the stored metadata and secrets of a repository whose directory was removed."""
+
+        if metadata_store is not None:
+            metadata_store.delete_repo_metadata(repo_id)
+
+    def to_file(self, path: Path) -> None:
+        if metadata_store is not None:
+            metadata_store.put_repo_metadata(self.repo_id, self.to_dict())
+        else:
+            data = self.to_dict()
+            metadata_file_cache.invalidate(path)
+            atomic_write_text(path, json.dumps(data, indent=2))
+            metadata_file_cache.store(path, data)
+        # Also in SQLite mode: repositories migrated from JSON keep their pocketgit.json on disk,
+        # and it must not show up as an untracked file.
         git_repo_cls = globals().get("GitRepo")
         if git_repo_cls:
             try:
@@ -58,23 +168,34 @@ class RepoMetadata:
 
 class GitRepo:
     METADATA_FILENAME = "pocketgit.json"
+    BRANCH_SORT_KEYS = {"recent": "-committerdate", "name": "refname"}
+    _metadata_ignored: Set[Path] = set()
 
-    def __init__(self, repo_id: str, base_path: Path):
+    def __init__(self, repo_id: str, base_path: Path, metadata: Optional[RepoMetadata] = None):
         self.repo_id = repo_id
         self.base_path = base_path
         self.path = base_path / repo_id
         if not self.path.exists():
             raise FileNotFoundError(f"Repository {repo_id} not found")
-        self.repo = Repo(self.path)
+        self.work_path = worktree_manager.active_path(self.path)
+        self.repo = git_metered.MeteredRepo(self.work_path)
+        # Callers listing many repositories pass metadata they already read in one batch.
+        self._metadata: Optional[RepoMetadata] = metadata
+        self._metadata_loaded = metadata is not None
 
     @property
     def metadata_path(self) -> Path:
         return self.path / self.METADATA_FILENAME
 
     def read_metadata(self) -> RepoMetadata | None:
-        return RepoMetadata.from_file(self.metadata_path, self.repo_id)
+        # GitRepo instances live for a single request, so one read per instance is enough.
+        if not self._metadata_loaded:
+            self._metadata = RepoMetadata.from_file(self.metadata_path, self.repo_id)
+            self._metadata_loaded = True
+        return self._metadata
 
     @classmethod
+    @git_operation("clone")
     def clone_to_path(
         cls,
         repo_id: str,
@@ -90,10 +211,9 @@ class GitRepo:
         target_path.parent.mkdir(parents=True, exist_ok=True)
 
         clone_url = cls._apply_auth_to_url(url, auth)
-        env = ssh_key_manager.get_env_for_key(ssh_key_id) if ssh_key_id else None
-        if env and not (url.startswith("git@") or urlparse(url).scheme in {"ssh"}):
-            env = None
-        repo = Repo.clone_from(clone_url, target_path, env=env)
+        uses_ssh = url.startswith("git@") or urlparse(url).scheme in {"ssh"}
+        with ssh_key_manager.session(ssh_key_id if uses_ssh else None, url) as env:
+            repo = git_metered.MeteredRepo.clone_from(clone_url, target_path, env=env)
 
         if branch:
             repo.git.checkout(branch)
@@ -107,12 +227,16 @@ class GitRepo:
             remote_url=url,
             default_branch=default_branch,
             ssh_key_id=ssh_key_id if env else None,
+            profile=repo_profile_service.apply(target_path),
         )
         metadata.to_file(target_path / cls.METADATA_FILENAME)
         return cls(repo_id, base_path)
 
     @classmethod
     def ensure_metadata_ignored(cls, repo_path: Path) -> None:
+        repo_path = repo_path.resolve()
+        if repo_path in cls._metadata_ignored:
+            return
         exclude_path = repo_path / ".git" / "info" / "exclude"
         try:
             exclude_path.parent.mkdir(parents=True, exist_ok=True)
@@ -121,11 +245,13 @@ class GitRepo:
                 existing = exclude_path.read_text(encoding="utf-8")
                 lines = {line.strip() for line in existing.splitlines() if line.strip()}
                 if cls.METADATA_FILENAME in lines:
+                    cls._metadata_ignored.add(repo_path)
                     return
             with exclude_path.open("a", encoding="utf-8") as handle:
                 if existing and not existing.endswith("\n"):
                     handle.write("\n")
                 handle.write(f"{cls.METADATA_FILENAME}\n")
+            cls._metadata_ignored.add(repo_path)
         except OSError:
             # If we fail to write to the exclude file, continue without raising.
             pass
@@ -144,8 +270,7 @@ class GitRepo:
         netloc = f"{credentials}@{netloc}"
         return urlunparse((parsed.scheme, netloc, parsed.path, parsed.params, parsed.query, parsed.fragment))
 
-    def _build_git_env(self) -> Optional[dict]:
-        metadata = self.read_metadata()
+    def _ssh_remote_url(self, metadata: Optional[RepoMetadata]) -> Optional[str]:
         if not metadata or not metadata.ssh_key_id:
             return None
         remote_url = metadata.remote_url
@@ -160,27 +285,34 @@ class GitRepo:
         if not remote_url:
             return None
         if remote_url.startswith("git@") or remote_url.startswith("ssh://"):
-            return ssh_key_manager.get_env_for_key(metadata.ssh_key_id)
+            return remote_url
         return None
 
-    def _get_remote_url(self, remote) -> Optional[str]:
+    @contextmanager
+    def _git_env(self, metadata: Optional[RepoMetadata]) -> Iterator[Optional[dict]]:
+        remote_url = self._ssh_remote_url(metadata)
+        if not remote_url:
+            yield None
+            return
+        with ssh_key_manager.session(metadata.ssh_key_id, remote_url) as env:
+            yield env
+
+    def _get_remote_url(self, remote, metadata: Optional[RepoMetadata]) -> Optional[str]:
         try:
             urls = list(remote.urls)
         except Exception:
             urls = []
         if urls:
             return urls[0]
-        metadata = self.read_metadata()
         if metadata and metadata.remote_url:
             return metadata.remote_url
         return None
 
-    def _get_http_auth_url(self, remote=None) -> Optional[str]:
+    def _get_http_auth_url(self, remote, metadata: Optional[RepoMetadata]) -> Optional[str]:
         base_url = None
         if remote is not None:
-            base_url = self._get_remote_url(remote)
+            base_url = self._get_remote_url(remote, metadata)
         if not base_url:
-            metadata = self.read_metadata()
             if metadata and metadata.remote_url:
                 base_url = metadata.remote_url
         if not base_url or not base_url.startswith(("http://", "https://")):
@@ -194,7 +326,7 @@ class GitRepo:
         metadata = self.read_metadata()
         if metadata and metadata.name:
             return metadata.name
-        return Path(self.repo.working_tree_dir).name
+        return self.path.name
 
     def get_default_remote(self):
         if not self.repo.remotes:
@@ -209,19 +341,94 @@ class GitRepo:
             return None
         return self.repo.active_branch.name
 
+    @git_operation("branches")
     def list_branches(self) -> List[str]:
         return sorted(branch.name for branch in self.repo.branches)
 
+    @git_operation("branches")
+    def list_branch_details(
+        self,
+        sort: str = "recent",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, List[dict]]:
+        if sort not in self.BRANCH_SORT_KEYS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        output = run_git(
+            self.work_path,
+            [
+                "for-each-ref",
+                f"--sort={self.BRANCH_SORT_KEYS[sort]}",
+                "--format=%(refname)%00%(objectname)%00%(committerdate:iso-strict)%00%(contents:subject)%00%(upstream)%1e",
+                "refs/heads",
+                "refs/remotes",
+            ],
+        )
+        oids: Dict[str, str] = {}
+        heads: List[List[str]] = []
+        for record in output.split("\x1e"):
+            fields = record.strip("\n").split("\0")
+            if len(fields) != 5:
+                continue
+            oids[fields[0]] = fields[1]
+            if fields[0].startswith("refs/heads/"):
+                heads.append(fields)
+
+        page = heads[offset:] if limit is None else heads[offset : offset + limit]
+        entries = []
+        for refname, oid, _, _, upstream in page:
+            entries.append(
+                BranchDivergence(
+                    branch=refname[len("refs/heads/"):],
+                    oid=oid,
+                    upstream=upstream or None,
+                    upstream_oid=oids.get(upstream) if upstream else None,
+                )
+            )
+        ahead_behind_service.fill(self.work_path, entries)
+
+        details = []
+        for entry, (_, _, committed_at, subject, _) in zip(entries, page):
+            upstream = entry.upstream
+            for prefix in ("refs/remotes/", "refs/heads/"):
+                if upstream and upstream.startswith(prefix):
+                    upstream = upstream[len(prefix):]
+            details.append(
+                {
+                    "name": entry.branch,
+                    "oid": entry.oid,
+                    "committedAt": committed_at or None,
+                    "subject": subject,
+                    "upstream": upstream,
+                    "ahead": entry.ahead,
+                    "behind": entry.behind,
+                }
+            )
+        return len(heads), details
+
+    @git_operation("branch")
+    @repo_operation
     def switch_branch(self, name: str) -> str:
+        if worktree_manager.enabled:
+            self.work_path = worktree_manager.switch(self.repo, self.path, name)
+            self.repo = git_metered.MeteredRepo(self.work_path)
+            return name
         self.repo.git.checkout(name)
         return name
 
+    @git_operation("branch")
+    @repo_operation
     def create_branch(self, name: str, from_ref: str) -> None:
         self.repo.git.branch(name, from_ref)
 
+    @git_operation("branch")
+    @repo_operation
     def delete_branch(self, name: str) -> None:
+        if worktree_manager.enabled:
+            worktree_manager.release(self.repo, self.path, name)
         self.repo.git.branch("-D", name)
 
+    @git_operation("tree")
     def get_tree(self, path: Optional[str]) -> List[dict]:
         root = Path(self.repo.working_tree_dir)
         target = ensure_within_repo(root, path)
@@ -232,11 +439,12 @@ class GitRepo:
             if child.name == ".git":
                 continue
             if child.is_dir():
-                entries.append({"type": "dir", "name": child.name})
+                entries.append({"type": "dir", "name": child.name, "size": None})
             else:
                 entries.append({"type": "file", "name": child.name, "size": child.stat().st_size})
         return entries
 
+    @git_operation("file")
     def read_file(self, path: str) -> str:
         root = Path(self.repo.working_tree_dir)
         target = ensure_within_repo(root, path)
@@ -244,6 +452,7 @@ class GitRepo:
             raise FileNotFoundError(path)
         return target.read_text(encoding="utf-8")
 
+    @git_operation("file")
     def read_file_bytes(self, path: str) -> bytes:
         root = Path(self.repo.working_tree_dir)
         target = ensure_within_repo(root, path)
@@ -251,20 +460,31 @@ class GitRepo:
             raise FileNotFoundError(path)
         return target.read_bytes()
 
+    @git_operation("file")
+    @repo_operation
     def write_file(self, path: str, content: str) -> None:
         root = Path(self.repo.working_tree_dir)
         target = ensure_within_repo(root, path)
         target.parent.mkdir(parents=True, exist_ok=True)
         target.write_text(content, encoding="utf-8")
 
+    @git_operation("stage")
+    @repo_operation
     def stage(self, paths: Iterable[str]) -> None:
         root = Path(self.repo.working_tree_dir)
         resolved_paths = [str(ensure_within_repo(root, p)) for p in paths]
-        self.repo.index.add(resolved_paths)
+        # The git CLI handles every index format (GitPython's index reader only knows version 2
+        # without a split index, which the large repo profile turns on).
+        if resolved_paths:
+            self.repo.git.add("--", *resolved_paths)
 
+    @git_operation("stage")
+    @repo_operation
     def stage_all(self) -> None:
         self.repo.git.add(A=True)
 
+    @git_operation("stage")
+    @repo_operation
     def unstage(self, paths: Iterable[str]) -> None:
         root = Path(self.repo.working_tree_dir)
         resolved_paths = [str(ensure_within_repo(root, p)) for p in paths]
@@ -279,8 +499,9 @@ class GitRepo:
     def has_staged_changes(self) -> bool:
         if self.repo.head.is_valid():
             return bool(self.repo.index.diff("HEAD"))
-        return bool(self.repo.index.entries)
+        return bool(self.repo.git.ls_files())
 
+    @git_operation("status")
     def get_status(self) -> dict:
         branch = self.get_current_branch()
         staged_entries = []
@@ -304,28 +525,24 @@ class GitRepo:
             "behind": behind,
         }
 
+    @git_operation("diff")
     def get_diff(self) -> str:
         try:
             staged = self.repo.git.diff("--cached")
-        except GitCommandError:
+        except git.GitCommandError:
             staged = ""
         try:
             unstaged = self.repo.git.diff()
-        except GitCommandError:
+        except git.GitCommandError:
             unstaged = ""
         return combine_diffs(staged, unstaged)
 
+    @git_operation("lfs")
     def list_lfs_pointers(self) -> List[dict]:
         entries: List[dict] = []
         try:
-            result = subprocess.run(
-                ["git", "lfs", "ls-files", "--json"],
-                cwd=self.path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            for line in result.stdout.splitlines():
+            output = run_git(self.work_path, ["lfs", "ls-files", "--json"])
+            for line in output.splitlines():
                 line = line.strip()
                 if not line:
                     continue
@@ -360,7 +577,7 @@ class GitRepo:
             return []
         try:
             tracked_files = self.repo.git.ls_files().splitlines()
-        except GitCommandError:
+        except git.GitCommandError:
             return []
         root = Path(self.repo.working_tree_dir)
         matches: List[dict] = []
@@ -373,7 +590,7 @@ class GitRepo:
 
     def _collect_lfs_patterns(self) -> List[str]:
         patterns: List[str] = []
-        attr_path = self.path / ".gitattributes"
+        attr_path = self.work_path / ".gitattributes"
         if not attr_path.exists():
             return patterns
         try:
@@ -421,21 +638,16 @@ class GitRepo:
             "present": False,
         }
 
+    @git_operation("lfs")
+    @repo_operation
     def fetch_lfs_file(self, path: str) -> dict:
-        env = self._build_git_env()
         try:
-            subprocess.run(
-                ["git", "lfs", "pull", "--include", path, "--exclude", ""],
-                cwd=self.path,
-                check=True,
-                capture_output=True,
-                env=env,
-            )
+            with self._git_env(self.read_metadata()) as env:
+                run_git(self.work_path, ["lfs", "pull", "--include", path, "--exclude", ""], env=env)
         except FileNotFoundError as exc:
             raise RuntimeError("Git LFS is not installed on the server") from exc
         except subprocess.CalledProcessError as exc:
-            stderr = exc.stderr.decode() if isinstance(exc.stderr, bytes) else exc.stderr
-            message = stderr or "Failed to fetch LFS file"
+            message = exc.stderr or "Failed to fetch LFS file"
             raise RuntimeError(message) from exc
 
         binary = self.read_file_bytes(path)
@@ -447,35 +659,59 @@ class GitRepo:
             "size": len(binary),
         }
 
+    @git_operation("commit")
+    @repo_operation
     def commit(self, message: str, author_name: str, author_email: str) -> str:
-        author = Actor(author_name, author_email)
-        commit = self.repo.index.commit(message, author=author, committer=author)
-        return commit.hexsha
+        env = {
+            "GIT_AUTHOR_NAME": author_name,
+            "GIT_AUTHOR_EMAIL": author_email,
+            "GIT_COMMITTER_NAME": author_name,
+            "GIT_COMMITTER_EMAIL": author_email,
+        }
+        self.repo.git.commit(
+            "--quiet",
+            "--allow-empty",
+            "--no-verify",
+            "--no-gpg-sign",
+            "--cleanup=verbatim",
+            "-m",
+            message,
+            env=env,
+        )
+        return self.repo.head.commit.hexsha
 
+    @git_operation("push")
+    @repo_operation
     def push(self) -> bool:
         remote = self.get_default_remote()
-        env = self._build_git_env()
-        if not env:
-            auth_url = self._get_http_auth_url(remote)
-            if auth_url:
-                result = self.repo.git.push(auth_url)
-                return bool(result)
-        results = remote.push(env=env) if env else remote.push()
+        metadata = self.read_metadata()
+        with self._git_env(metadata) as env:
+            if not env:
+                auth_url = self._get_http_auth_url(remote, metadata)
+                if auth_url:
+                    result = self.repo.git.push(auth_url)
+                    return bool(result)
+            results = remote.push(env=env) if env else remote.push()
         return bool(results)
 
+    @git_operation("fetch")
+    @repo_operation
     def fetch(self) -> None:
         remote = self.get_default_remote()
-        env = self._build_git_env()
-        if not env:
-            auth_url = self._get_http_auth_url(remote)
-            if auth_url:
-                self.repo.git.fetch(auth_url)
-                return
-        if env:
-            remote.fetch(env=env)
-        else:
-            remote.fetch()
+        metadata = self.read_metadata()
+        with self._git_env(metadata) as env:
+            if not env:
+                auth_url = self._get_http_auth_url(remote, metadata)
+                if auth_url:
+                    self.repo.git.fetch(auth_url)
+                    return
+            if env:
+                remote.fetch(env=env)
+            else:
+                remote.fetch()
 
+    @git_operation("merge")
+    @repo_operation
     def merge_or_rebase(self, from_branch: str, strategy: str) -> str:
         if strategy == "merge":
             self.repo.git.merge(from_branch)
@@ -485,6 +721,7 @@ class GitRepo:
             return "rebased"
         raise ValueError("Unknown strategy")
 
+    @git_operation("search")
     def search(self, query: str) -> List[dict]:
         if not query:
             return []
@@ -502,45 +739,99 @@ class GitRepo:
                         results.append({"path": file_path, "line": index, "preview": preview})
         return results
 
+    @git_operation("log")
+    def get_log(
+        self,
+        ref: str = "HEAD",
+        path: Optional[str] = None,
+        author: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> dict:
+        if path:
+            path = self._relative_path(path)
+        return commit_log_service.page(self.work_path, ref=ref, path=path, author=author, cursor=cursor, limit=limit)
+
+    @git_operation("history")
+    def get_file_history(
+        self,
+        path: str,
+        ref: str = "HEAD",
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> dict:
+        return commit_log_service.page(
+            self.work_path,
+            ref=ref,
+            path=self._relative_path(path, require_file=True),
+            cursor=cursor,
+            limit=limit,
+            follow=True,
+        )
+
+    @git_operation("blame")
+    def blame(self, path: str, ref: str = "HEAD") -> Tuple[str, Iterator[dict]]:
+        relative = self._relative_path(path, require_file=True)
+        oid = commit_log_service.resolve(self.work_path, ref)
+        blame_service.check_path(self.work_path, oid, relative)
+        return oid, blame_service.stream(self.work_path, oid, relative)
+
+    def _relative_path(self, path: str, require_file: bool = False) -> str:
+        target = ensure_within_repo(self.work_path, path)
+        relative = target.relative_to(self.work_path.resolve()).as_posix()
+        if require_file and relative == ".":
+            raise ValueError("A file path is required")
+        return relative
+
+    @git_operation("ahead_behind")
     def get_ahead_behind(self) -> tuple[int, int]:
-        branch = self.get_current_branch()
-        if not branch:
+        git_dir = resolve_git_dir(self.work_path)
+        if git_dir is None:
             return 0, 0
-        try:
-            tracking = self.repo.active_branch.tracking_branch()
-        except TypeError:
-            tracking = None
-        if not tracking:
+        _, head_oid, _, upstream_oid = read_tracking(git_dir)
+        if not head_oid or not upstream_oid:
             return 0, 0
         try:
-            tracking_ref = tracking.name
-            result = subprocess.run(
-                [
-                    "git",
-                    "rev-list",
-                    "--left-right",
-                    "--count",
-                    f"{tracking_ref}...HEAD",
-                ],
-                cwd=self.path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            behind_str, ahead_str = result.stdout.strip().split()
-            ahead = int(ahead_str)
-            behind = int(behind_str)
-            return ahead, behind
+            return ahead_behind_service.counts(self.work_path, head_oid, upstream_oid)
         except Exception:
             return 0, 0
 
+    def state_validator(self, *parts: object) -> Optional[str]:
+        """Return an ETag for the repository's state as seen by API requests, or ``None`` when disabled.
+
+        It combines the working tree in use, HEAD and its upstream, the stat of the index and the
+        generation token replaced after every write through the API, plus the caller's ``parts``
+        (route and query parameters). Nothing runs git, so it costs a few small file reads. Edits
+        made to the working tree outside the API are not seen until the next API write.
+        """
+
+        if not conditional.ENABLED:
+            return None
+        git_dir = resolve_git_dir(self.work_path)
+        if git_dir is None:
+            return None
+        try:
+            index = (git_dir / "index").stat()
+            index_stamp: Optional[Tuple[int, int, int]] = (index.st_mtime_ns, index.st_size, index.st_ino)
+        except OSError:
+            index_stamp = None
+        return conditional.make_etag(
+            str(self.work_path),
+            read_tracking(git_dir),
+            index_stamp,
+            repo_locks.generation(self.path),
+            *parts,
+        )
+
     def get_summary(self) -> dict:
         branch = self.get_current_branch()
         ahead, behind = self.get_ahead_behind()
+        metadata = self.read_metadata()
         return {
             "repoId": self.repo_id,
             "name": self.get_name(),
             "currentBranch": branch,
             "ahead": ahead,
             "behind": behind,
+            "profile": metadata.profile.get("name") if metadata and metadata.profile else None,
         }
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..utils.fs_utils import file_lock
+from ..utils.git_cmd import run_git
+from ..utils.git_refs import common_git_dir, resolve_git_dir
+from .repo_locks import repo_locks
+from .repo_manager import RepoManager, repo_manager
+
+HEX_DIGITS = set("0123456789abcdef")
+
+
+@dataclass
+class RepoMaintenanceMetrics:
+    loose_objects: int
+    packs: int
+    commit_graph: bool
+    multi_pack_index: bool
+
+
+@dataclass
+class RepoMaintenanceRecord:
+    last_run: Optional[str] = None
+    last_tasks: List[str] = field(default_factory=list)
+    last_skipped: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+def collect_metrics(repo_path: Path) -> Optional[RepoMaintenanceMetrics]:
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    objects = common_git_dir(git_dir) / "objects"
+    loose = 0
+    try:
+        fanout = [entry for entry in objects.iterdir() if len(entry.name) == 2 and set(entry.name) <= HEX_DIGITS]
+    except OSError:
+        fanout = []
+    for directory in fanout:
+        try:
+            loose += sum(1 for _ in directory.iterdir())
+        except OSError:
+            continue
+    pack_dir = objects / "pack"
+    info_dir = objects / "info"
+    return RepoMaintenanceMetrics(
+        loose_objects=loose,
+        packs=len(list(pack_dir.glob("*.pack"))) if pack_dir.exists() else 0,
+        commit_graph=(info_dir / "commit-graph").exists() or (info_dir / "commit-graphs" / "commit-graph-chain").exists(),
+        multi_pack_index=(pack_dir / "multi-pack-index").exists(),
+    )
+
+
+def parse_window(value: str) -> Optional[Tuple[dt_time, dt_time]]:
+    """Parse ``HH:MM-HH:MM`` (local time, may wrap past midnight); an empty value means always."""
+
+    if not value.strip():
+        return None
+    start, _, end = value.partition("-")
+    return dt_time.fromisoformat(start.strip()), dt_time.fromisoformat(end.strip())
+
+
+class MaintenanceScheduler:
+    INTERVAL_SECONDS = float(os.getenv("POCKETGIT_MAINTENANCE_INTERVAL", "900"))
+    CONCURRENCY = int(os.getenv("POCKETGIT_MAINTENANCE_CONCURRENCY", "1"))
+    LOOSE_OBJECTS_THRESHOLD = int(os.getenv("POCKETGIT_MAINTENANCE_LOOSE_OBJECTS", "100"))
+    PRUNE_THRESHOLD = int(os.getenv("POCKETGIT_MAINTENANCE_PRUNE_OBJECTS", "1000"))
+    PACKS_THRESHOLD = int(os.getenv("POCKETGIT_MAINTENANCE_PACKS", "10"))
+    PRUNE_EXPIRE = "2.weeks.ago"
+    SLOTS_DIRNAME = ".pocketgit-maintenance"
+
+    def __init__(self, manager: RepoManager, enabled: bool = True, window: Optional[Tuple[dt_time, dt_time]] = None):
+        self.manager = manager
+        self.enabled = enabled
+        self.window = window
+        self._records: Dict[str, RepoMaintenanceRecord] = {}
+        self._records_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        if self.window is None:
+            return True
+        current = (now or datetime.now()).time()
+        start, end = self.window
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def plan(self, metrics: RepoMaintenanceMetrics) -> List[str]:
+        tasks: List[str] = []
+        if metrics.loose_objects >= self.LOOSE_OBJECTS_THRESHOLD:
+            tasks.append("loose-objects")
+        if metrics.packs >= self.PACKS_THRESHOLD or (metrics.packs > 1 and not metrics.multi_pack_index):
+            tasks.append("incremental-repack")
+        if tasks or not metrics.commit_graph:
+            tasks.append("commit-graph")
+        if metrics.loose_objects >= self.PRUNE_THRESHOLD:
+            tasks.append("prune")
+        return tasks
+
+    def _record(self, repo_id: str) -> RepoMaintenanceRecord:
+        with self._records_lock:
+            return self._records.setdefault(repo_id, RepoMaintenanceRecord())
+
+    @contextmanager
+    def _budget_slot(self) -> Iterator[bool]:
+        """Claim one of ``CONCURRENCY`` host-wide slots, shared by every worker using the same repos directory."""
+
+        slots_dir = self.manager.base_path / self.SLOTS_DIRNAME
+        for index in range(max(1, self.CONCURRENCY)):
+            with ExitStack() as stack:
+                try:
+                    claimed = stack.enter_context(file_lock(slots_dir / f"slot-{index}.lock", blocking=False))
+                except OSError:
+                    claimed = False
+                if claimed:
+                    yield True
+                    return
+        yield False
+
+    @staticmethod
+    def _run_task(repo_path: Path, task: str) -> None:
+        # A user write may start while a task runs. git maintenance tasks are built to run alongside
+        # other git commands, and prune only drops unreachable objects older than PRUNE_EXPIRE, as
+        # the prune step of git gc --auto does.
+        if task == "prune":
+            run_git(repo_path, ["prune", f"--expire={MaintenanceScheduler.PRUNE_EXPIRE}"])
+        else:
+            run_git(repo_path, ["maintenance", "run", f"--task={task}"])
+
+    def maintain(self, repo_id: str) -> List[str]:
+        """Run the tasks a repository needs, backing off as soon as a user operation touches it."""
+
+        repo_path = self.manager.base_path / repo_id
+        record = self._record(repo_id)
+        metrics = collect_metrics(repo_path)
+        if metrics is None:
+            return []
+        tasks = self.plan(metrics)
+        if not tasks:
+            return []
+        completed: List[str] = []
+        with repo_locks.maintenance(repo_path) as claimed, self._budget_slot() as slot:
+            if not claimed:
+                record.last_skipped = "busy"
+                return []
+            if not slot:
+                record.last_skipped = "budget"
+                return []
+            record.last_skipped = record.last_error = None
+            for task in tasks:
+                if self._stop.is_set():
+                    break
+                # The probe covers user operations in every worker; index.lock also covers git run by hand.
+                if not repo_locks.idle(repo_path) or (repo_path / ".git" / "index.lock").exists():
+                    record.last_skipped = "busy"
+                    break
+                try:
+                    self._run_task(repo_path, task)
+                except (OSError, subprocess.CalledProcessError) as exc:
+                    stderr = getattr(exc, "stderr", None)
+                    record.last_error = f"{task}: {(stderr or str(exc)).strip()}"
+                    break
+                completed.append(task)
+        if completed:
+            record.last_run = datetime.now(timezone.utc).isoformat()
+            record.last_tasks = completed
+        return completed
+
+    def run_once(self) -> Dict[str, List[str]]:
+        if not self.in_window():
+            return {}
+        repo_ids = self.manager.list_repo_ids()
+        results: Dict[str, List[str]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.CONCURRENCY), thread_name_prefix="pocketgit-maintenance") as pool:
+            futures = {pool.submit(self.maintain, repo_id): repo_id for repo_id in repo_ids}
+            wait(futures)
+            for future, repo_id in futures.items():
+                if future.exception() is None and future.result():
+                    results[repo_id] = future.result()
+        return results
+
+    def status(self, repo_id: str) -> Optional[dict]:
+        metrics = collect_metrics(self.manager.base_path / repo_id)
+        if metrics is None:
+            return None
+        with self._records_lock:
+            record = self._records.get(repo_id) or RepoMaintenanceRecord()
+        return {
+            "looseObjects": metrics.loose_objects,
+            "packs": metrics.packs,
+            "commitGraph": metrics.commit_graph,
+            "multiPackIndex": metrics.multi_pack_index,
+            "pendingTasks": self.plan(metrics),
+            "lastRun": record.last_run,
+            "lastTasks": list(record.last_tasks),
+            "lastSkipped": record.last_skipped,
+            "lastError": record.last_error,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.INTERVAL_SECONDS):
+            try:
+                self.run_once()
+            except Exception:
+                continue
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="pocketgit-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the loop and wait for it; a run in progress finishes its current task first."""
+
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+
+maintenance_scheduler = MaintenanceScheduler(
+    repo_manager,
+    enabled=os.getenv("POCKETGIT_MAINTENANCE", "1") != "0",
+    window=parse_window(os.getenv("POCKETGIT_MAINTENANCE_WINDOW", "")),
+)
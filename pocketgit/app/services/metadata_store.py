@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+SCHEMA_MIGRATIONS = {
+    1: [
+        "CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password_hash TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS repo_metadata ("
+        "repo_id TEXT PRIMARY KEY, name TEXT, ssh_key_id TEXT, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS repo_metadata_ssh_key ON repo_metadata (ssh_key_id)",
+        "CREATE TABLE IF NOT EXISTS secrets ("
+        "repo_id TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (repo_id, name))",
+        "CREATE TABLE IF NOT EXISTS ssh_keys (id TEXT PRIMARY KEY, name TEXT, created_at TEXT NOT NULL)",
+    ],
+    2: [
+        "ALTER TABLE secrets ADD COLUMN mask_length INTEGER",
+        "ALTER TABLE secrets ADD COLUMN key_id TEXT",
+    ],
+    3: [
+        "ALTER TABLE repo_metadata ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    ],
+}
+
+
+class MetadataStore:
+    SCHEMA_VERSION = max(SCHEMA_MIGRATIONS)
+    BUSY_TIMEOUT_MS = 5000
+    QUERY_CHUNK = 500  # Stays below SQLite's default limit of 999 bound parameters.
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._initialize()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _initialize(self) -> None:
+        with self._transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+            for step in range(version + 1, self.SCHEMA_VERSION + 1):
+                for statement in SCHEMA_MIGRATIONS[step]:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+    def get_user_hash(self, username: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return row["password_hash"] if row else None
+
+    def user_exists(self, username: str) -> bool:
+        return self.get_user_hash(username) is not None
+
+    def add_user(self, username: str, password_hash: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                (username, password_hash),
+            )
+            return cursor.rowcount == 1
+
+    def delete_user(self, username: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount == 1
+
+    def get_repo_metadata(self, repo_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM repo_metadata WHERE repo_id = ?", (repo_id,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def put_repo_metadata(self, repo_id: str, data: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            # The version is unique across the table, so a discarded and re-created row never reuses one.
+            conn.execute(
+                "INSERT INTO repo_metadata (repo_id, name, ssh_key_id, data, version) "
+                "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM repo_metadata)) "
+                "ON CONFLICT (repo_id) DO UPDATE SET name = excluded.name, "
+                "ssh_key_id = excluded.ssh_key_id, data = excluded.data, version = excluded.version",
+                (repo_id, data.get("name"), data.get("ssh_key_id"), json.dumps(data)),
+            )
+
+    def _select_repo_metadata(self, columns: str, repo_ids: Optional[Iterable[str]]) -> List[sqlite3.Row]:
+        conn = self._connection()
+        if repo_ids is None:
+            return conn.execute(f"SELECT repo_id, {columns} FROM repo_metadata ORDER BY repo_id").fetchall()
+        ids = list(dict.fromkeys(repo_ids))
+        rows: List[sqlite3.Row] = []
+        for start in range(0, len(ids), self.QUERY_CHUNK):
+            chunk = ids[start : start + self.QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(
+                conn.execute(f"SELECT repo_id, {columns} FROM repo_metadata WHERE repo_id IN ({placeholders})", chunk)
+            )
+        return rows
+
+    def list_repo_metadata(self, repo_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Metadata of ``repo_ids`` (or every repository) through primary-key lookups, one query per chunk."""
+
+        return {row["repo_id"]: json.loads(row["data"]) for row in self._select_repo_metadata("data", repo_ids)}
+
+    def list_repo_metadata_versions(self, repo_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Version of each stored metadata row, which changes on every write; one query per chunk."""
+
+        return {row["repo_id"]: row["version"] for row in self._select_repo_metadata("version", repo_ids)}
+
+    def delete_repo_metadata(self, repo_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM repo_metadata WHERE repo_id = ?", (repo_id,))
+            conn.execute("DELETE FROM secrets WHERE repo_id = ?", (repo_id,))
+
+    def get_secrets(self, repo_id: str) -> Dict[str, Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT name, value, mask_length, key_id FROM secrets WHERE repo_id = ?", (repo_id,)
+        )
+        return {row["name"]: {"value": row["value"], "mask_length": row["mask_length"], "key_id": row["key_id"]} for row in rows}
+
+    def set_secret(
+        self,
+        repo_id: str,
+        name: str,
+        value: str,
+        mask_length: Optional[int] = None,
+        key_id: Optional[str] = None,
+    ) -> None:
+        self.set_secrets(repo_id, {name: {"value": value, "mask_length": mask_length, "key_id": key_id}})
+
+    def set_secrets(self, repo_id: str, records: Dict[str, Dict[str, Any]]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO secrets (repo_id, name, value, mask_length, key_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (repo_id, name) DO UPDATE SET value = excluded.value, "
+                "mask_length = excluded.mask_length, key_id = excluded.key_id",
+                [
+                    (repo_id, name, record["value"], record.get("mask_length"), record.get("key_id"))
+                    for name, record in records.items()
+                ],
+            )
+
+    def replace_secrets(self, repo_id: str, updates: Dict[str, Tuple[str, Dict[str, Any]]]) -> int:
+        """Overwrite each named secret whose stored value still equals the given old value.
+
+        ``updates`` maps names to ``(old value, new record)``. A secret written by someone else since
+        it was read keeps that newer value. Returns the number of secrets replaced.
+        """
+
+        with self._transaction() as conn:
+            return sum(
+                conn.execute(
+                    "UPDATE secrets SET value = ?, mask_length = ?, key_id = ? "
+                    "WHERE repo_id = ? AND name = ? AND value = ?",
+                    (record["value"], record.get("mask_length"), record.get("key_id"), repo_id, name, old_value),
+                ).rowcount
+                for name, (old_value, record) in updates.items()
+            )
+
+    def list_secret_repo_ids(self) -> List[str]:
+        rows = self._connection().execute("SELECT DISTINCT repo_id FROM secrets ORDER BY repo_id")
+        return [row["repo_id"] for row in rows]
+
+    def delete_secret(self, repo_id: str, name: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM secrets WHERE repo_id = ? AND name = ?", (repo_id, name))
+            return cursor.rowcount == 1
+
+    def list_ssh_keys(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute("SELECT id, name, created_at FROM ssh_keys ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def put_ssh_key(self, key_id: str, name: Optional[str], created_at: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO ssh_keys (id, name, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, created_at = excluded.created_at",
+                (key_id, name, created_at),
+            )
+
+    def delete_ssh_key(self, key_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM ssh_keys WHERE id = ?", (key_id,))
+
+    def migrate_from_json(
+        self,
+        users_path: Path,
+        repos_path: Path,
+        secrets_path: Path,
+        keys_path: Path,
+        metadata_filename: str = "pocketgit.json",
+    ) -> Dict[str, int]:
+        """Import the legacy JSON files, keeping any rows that already exist."""
+
+        counts = {"users": 0, "repos": 0, "secrets": 0, "keys": 0}
+        users = _read_json_object(users_path)
+        repo_files = sorted(repos_path.glob(f"*/{metadata_filename}")) if repos_path.exists() else []
+        secret_files = sorted(secrets_path.glob("*.json")) if secrets_path.exists() else []
+        key_files = sorted(keys_path.glob("*.json")) if keys_path.exists() else []
+
+        with self._transaction() as conn:
+            for username, password_hash in users.items():
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                    (str(username), str(password_hash)),
+                )
+                counts["users"] += cursor.rowcount
+            for meta_path in repo_files:
+                data = _read_json_object(meta_path)
+                if not data:
+                    continue
+                repo_id = meta_path.parent.name
+                data["repoId"] = repo_id
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO repo_metadata (repo_id, name, ssh_key_id, data) VALUES (?, ?, ?, ?)",
+                    (repo_id, data.get("name"), data.get("ssh_key_id"), json.dumps(data)),
+                )
+                counts["repos"] += cursor.rowcount
+            for secret_path in secret_files:
+                for name, record in _read_secret_file(secret_path).items():
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO secrets (repo_id, name, value, mask_length, key_id) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (secret_path.stem, name, record["value"], record.get("mask_length"), record.get("key_id")),
+                    )
+                    counts["secrets"] += cursor.rowcount
+            for key_path in key_files:
+                data = _read_json_object(key_path)
+                created_at = data.get("createdAt") or data.get("created_at")
+                if not created_at:
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO ssh_keys (id, name, created_at) VALUES (?, ?, ?)",
+                    (data.get("id") or key_path.stem, data.get("name"), created_at),
+                )
+                counts["keys"] += cursor.rowcount
+        return counts
+
+
+def _read_json_object(path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _read_secret_file(path: Path) -> Dict[str, Dict[str, Any]]:
+    data = _read_json_object(path)
+    if isinstance(data.get("secrets"), dict) and "version" in data:
+        return {
+            str(name): {"value": entry["value"], "mask_length": entry.get("mask"), "key_id": entry.get("key")}
+            for name, entry in data["secrets"].items()
+            if isinstance(entry, dict) and isinstance(entry.get("value"), str)
+        }
+    return {str(name): {"value": str(value)} for name, value in data.items()}
+
+
+project_root = Path(__file__).resolve().parent.parent.parent
+default_store_path = project_root / "state" / "pocketgit.db"
+
+
+def _create_store() -> Optional[MetadataStore]:
+    if os.getenv("POCKETGIT_STORE", "json").lower() != "sqlite":
+        return None
+    return MetadataStore(Path(os.getenv("POCKETGIT_STORE_PATH", str(default_store_path))))
+
+
+metadata_store = _create_store()
+
+
+def main(argv: List[str]) -> int:
+    if argv[:1] != ["migrate"]:
+        print("usage: python -m app.services.metadata_store migrate", file=sys.stderr)
+        return 2
+    store = metadata_store or MetadataStore(Path(os.getenv("POCKETGIT_STORE_PATH", str(default_store_path))))
+    counts = store.migrate_from_json(
+        users_path=project_root / "auth" / "users.json",
+        repos_path=project_root / "repos",
+        secrets_path=project_root / "secrets",
+        keys_path=project_root / "app" / "keys",
+    )
+    print(json.dumps({"database": str(store.db_path), "imported": counts}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Set, TypeVar
+
+from ..utils.fs_utils import atomic_write_text, file_lock
+from ..utils.metrics import registry
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAINTENANCE_BACKOFFS = registry.counter(
+    "pocketgit_repo_maintenance_backoffs_total",
+    "Maintenance claims refused because a user operation held the repository.",
+)
+LOCK_WAIT_SECONDS = registry.histogram(
+    "pocketgit_repo_lock_wait_seconds",
+    "Time user operations spent acquiring the repository's maintenance lock, by outcome.",
+    ("outcome",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+
+class RepoLocks:
+    """Per-repository coordination between user operations and background maintenance.
+
+    User operations register that they are in flight and hold a shared lock on
+    ``.git/pocketgit/maintenance.lock``. Maintenance claims a repository without blocking, and only
+    while no user operation is running: in-process through the registry, and across uvicorn workers
+    by probing that lock exclusively before each task. Neither side ever waits for the other. The
+    probe is released at once, so a user operation that starts while a task runs proceeds alongside
+    it; maintenance only runs tasks git supports concurrently with other commands.
+
+    Every finished user operation also replaces the repository's generation token in
+    ``.git/pocketgit/generation``. It lives on disk so all workers see it, and it is a fresh random
+    value rather than a counter so concurrent bumps from different processes cannot collide.
+    """
+
+    GENERATION_FILENAME = "pocketgit/generation"
+    MAINTENANCE_LOCK_FILENAME = "pocketgit/maintenance.lock"
+
+    def __init__(self):
+        self._active: Dict[str, int] = {}
+        self._maintaining: Set[str] = set()
+        self._lock = threading.Lock()
+        registry.gauge(
+            "pocketgit_repo_operations_in_flight",
+            "User write operations currently running across all repositories.",
+        ).track(self.in_flight)
+
+    @staticmethod
+    def _key(repo_path: Path) -> str:
+        return str(repo_path.resolve())
+
+    @contextmanager
+    def user_operation(self, repo_path: Path) -> Iterator[None]:
+        key = self._key(repo_path)
+        with self._lock:
+            self._active[key] = self._active.get(key, 0) + 1
+        try:
+            with ExitStack() as stack:
+                started = time.perf_counter()
+                try:
+                    # Never wait: the lock is only refused during a maintenance probe, and the task
+                    # that probe admits is safe to run alongside this operation anyway.
+                    locked = stack.enter_context(
+                        file_lock(repo_path / ".git" / self.MAINTENANCE_LOCK_FILENAME, shared=True, blocking=False)
+                    )
+                    outcome = "acquired" if locked else "contended"
+                except OSError:
+                    outcome = "error"  # No writable .git directory, so maintenance cannot run on it either.
+                if registry.enabled:
+                    LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, outcome)
+                yield
+        finally:
+            self._bump_generation(repo_path)
+            with self._lock:
+                remaining = self._active.get(key, 1) - 1
+                if remaining:
+                    self._active[key] = remaining
+                else:
+                    self._active.pop(key, None)
+
+    def _bump_generation(self, repo_path: Path) -> None:
+        try:
+            atomic_write_text(repo_path / ".git" / self.GENERATION_FILENAME, os.urandom(8).hex())
+        except OSError:
+            pass  # The repository was deleted or is read-only; there is nothing left to invalidate.
+
+    def generation(self, repo_path: Path) -> str:
+        """Return the token replaced after each user operation (empty before the first one)."""
+
+        try:
+            return (repo_path / ".git" / self.GENERATION_FILENAME).read_text(encoding="utf-8")
+        except OSError:
+            return ""
+
+    def idle(self, repo_path: Path) -> bool:
+        """Return ``True`` if no user operation in any process holds the repository right now."""
+
+        try:
+            with file_lock(repo_path / ".git" / self.MAINTENANCE_LOCK_FILENAME, blocking=False) as idle:
+                pass
+        except OSError:
+            idle = False
+        if not idle:
+            MAINTENANCE_BACKOFFS.inc()
+        return idle
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(self._active.values())
+
+    @contextmanager
+    def maintenance(self, repo_path: Path) -> Iterator[bool]:
+        """Yield ``True`` if the repository was idle and is now claimed for maintenance, else ``False``."""
+
+        key = self._key(repo_path)
+        with self._lock:
+            claimed = key not in self._active and key not in self._maintaining
+            if claimed:
+                self._maintaining.add(key)
+            else:
+                MAINTENANCE_BACKOFFS.inc()
+        try:
+            yield claimed
+        finally:
+            if claimed:
+                with self._lock:
+                    self._maintaining.discard(key)
+
+
+repo_locks = RepoLocks()
+
+
+def repo_operation(method: F) -> F:
+    """Mark a ``GitRepo`` method as a user operation so maintenance backs off while it runs."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        with repo_locks.user_operation(self.path):
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -3,17 +3,23 @@ from __future__ import annotations
 import random
 import string
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException, status
 
-from .git_repo import GitRepo
+from ..utils.lazy import lazy_service
+
+from .git_repo import GitRepo, RepoMetadata
+from .repo_summaries import RepoSummaryCache
 
 
 class RepoManager:
+    SUMMARY_CACHE_FILENAME = ".pocketgit-summaries.json"
+
     def __init__(self, base_path: Path):
         self.base_path = base_path
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.summary_cache = RepoSummaryCache(base_path / self.SUMMARY_CACHE_FILENAME)
 
     def generate_repo_id(self, length: int = 10) -> str:
         alphabet = string.ascii_lowercase + string.digits
@@ -48,15 +54,35 @@ class RepoManager:
 
     def list_repositories(self) -> List[GitRepo]:
         repos: List[GitRepo] = []
-        for entry in sorted(self.base_path.iterdir() if self.base_path.exists() else []):
-            if not entry.is_dir():
-                continue
+        entries = sorted(entry for entry in (self.base_path.iterdir() if self.base_path.exists() else []) if entry.is_dir())
+        stored = RepoMetadata.load_many(entry.name for entry in entries)
+        for entry in entries:
             try:
-                repos.append(GitRepo(entry.name, self.base_path))
+                repos.append(GitRepo(entry.name, self.base_path, metadata=stored.get(entry.name)))
             except Exception:
                 continue
         return repos
 
+    def list_repo_ids(self) -> List[str]:
+        if not self.base_path.exists():
+            return []
+        return sorted(
+            entry.name
+            for entry in self.base_path.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".") and (entry / ".git").exists()
+        )
+
+    def list_summaries(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Tuple[int, List[dict]]:
+        repo_ids = self.list_repo_ids()
+        self.summary_cache.prune(repo_ids)
+        page = repo_ids[offset:] if limit is None else repo_ids[offset : offset + limit]
+        return len(repo_ids), self.summary_cache.summaries(self.base_path, page, fields)
+
 
 base_repo_path = Path(__file__).resolve().parent.parent.parent / "repos"
-repo_manager = RepoManager(base_repo_path)
+repo_manager = lazy_service(lambda: RepoManager(base_repo_path))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import functools
+import os
+import struct
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from ..utils.git_cmd import run_git
+from ..utils.git_refs import resolve_git_dir
+
+LARGE_REPO_SETTINGS = (
+    ("feature.manyFiles", "true"),
+    ("core.untrackedCache", "true"),
+    ("index.version", "4"),
+    ("core.splitIndex", "true"),
+)
+
+
+def count_index_entries(repo_path: Path) -> Optional[int]:
+    """Read the entry count from the index header without parsing the index."""
+
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    try:
+        with (git_dir / "index").open("rb") as handle:
+            header = handle.read(12)
+    except OSError:
+        return None
+    if len(header) != 12 or header[:4] != b"DIRC":
+        return None
+    return struct.unpack(">I", header[8:12])[0]
+
+
+@functools.lru_cache(maxsize=1)
+def fsmonitor_daemon_supported() -> bool:
+    """The built-in fsmonitor daemon only exists on some platforms (macOS and Windows builds)."""
+
+    try:
+        output = run_git(None, ["version", "--build-options"])
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return "fsmonitor--daemon" in output
+
+
+class RepoProfileService:
+    """Pick and apply per-repository git settings at clone/import time."""
+
+    def __init__(self, mode: str = "auto", large_repo_files: int = 20000):
+        self.mode = mode
+        self.large_repo_files = large_repo_files
+
+    def is_large(self, file_count: Optional[int]) -> bool:
+        if self.mode == "always":
+            return True
+        if self.mode == "never" or file_count is None:
+            return False
+        return file_count >= self.large_repo_files
+
+    @staticmethod
+    def apply_large_repo_profile(repo_path: Path) -> List[str]:
+        settings = list(LARGE_REPO_SETTINGS)
+        if fsmonitor_daemon_supported():
+            settings.append(("core.fsmonitor", "true"))
+        for key, value in settings:
+            run_git(repo_path, ["config", key, value])
+        # Rewrite the existing index so the first status already benefits.
+        run_git(repo_path, ["update-index", "--index-version", "4", "--split-index", "--untracked-cache"])
+        return [f"{key}={value}" for key, value in settings]
+
+    def apply(self, repo_path: Path) -> dict:
+        file_count = count_index_entries(repo_path)
+        if not self.is_large(file_count):
+            return {"name": "default", "files": file_count, "settings": []}
+        try:
+            settings = self.apply_large_repo_profile(repo_path)
+        except (OSError, subprocess.CalledProcessError):
+            return {"name": "default", "files": file_count, "settings": []}
+        return {"name": "large", "files": file_count, "settings": settings}
+
+
+repo_profile_service = RepoProfileService(
+    mode=os.getenv("POCKETGIT_LARGE_REPO_PROFILE", "auto").lower(),
+    large_repo_files=int(os.getenv("POCKETGIT_LARGE_REPO_FILES", "20000")),
+)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.fs_utils import atomic_write_text
+from ..utils.git_refs import read_tracking, resolve_git_dir
+from ..utils.metrics import track_executor
+from .git_repo import GitRepo, RepoMetadata
+from .worktrees import worktree_manager
+
+SUMMARY_FIELDS = ("repoId", "name", "currentBranch", "ahead", "behind", "profile")
+COUNT_FIELDS = frozenset({"ahead", "behind"})
+
+
+class RepoSummaryCache:
+    """Persisted repository summaries, reused while HEAD, its upstream and the repository metadata are unchanged."""
+
+    CACHE_VERSION = 2
+    REFRESH_WORKERS = int(os.getenv("POCKETGIT_SUMMARY_WORKERS", "8"))
+
+    def __init__(self, cache_path: Path):
+        self.cache_path = cache_path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.REFRESH_WORKERS, thread_name_prefix="pocketgit-summary")
+        track_executor("summary", self._executor)
+
+    def _load_entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if self._entries is None:
+                try:
+                    data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    data = {}
+                if not isinstance(data, dict) or data.get("version") != self.CACHE_VERSION:
+                    data = {}
+                entries = data.get("repos")
+                self._entries = entries if isinstance(entries, dict) else {}
+            return self._entries
+
+    def _save_entries(self) -> None:
+        # Called with self._lock held.
+        payload = {"version": self.CACHE_VERSION, "repos": self._entries or {}}
+        try:
+            atomic_write_text(self.cache_path, json.dumps(payload, sort_keys=True))
+        except OSError:
+            pass
+
+    @staticmethod
+    def fingerprint(repo_path: Path, metadata_version: Optional[int] = None) -> Optional[List[Any]]:
+        """Cache key of a repository's summary; ``metadata_version`` is its SQLite store version, if any.
+
+        Metadata in the store is identified by that version, since ``pocketgit.json`` is no longer
+        written there; otherwise the file's mtime stands in.
+        """
+
+        git_dir = resolve_git_dir(worktree_manager.active_path(repo_path))
+        if git_dir is None:
+            return None
+        head_ref, head_oid, upstream, upstream_oid = read_tracking(git_dir)
+        if metadata_version is not None:
+            metadata_stamp: Any = ["store", metadata_version]
+        else:
+            try:
+                metadata_stamp = (repo_path / GitRepo.METADATA_FILENAME).stat().st_mtime_ns
+            except OSError:
+                metadata_stamp = None
+        return [head_ref, head_oid, upstream, upstream_oid, metadata_stamp]
+
+    @staticmethod
+    def _light_summary(
+        repo_id: str,
+        repo_path: Path,
+        key: List[Any],
+        metadata: Optional[RepoMetadata] = None,
+    ) -> Dict[str, Any]:
+        if metadata is None:
+            metadata = RepoMetadata.from_file(repo_path / GitRepo.METADATA_FILENAME, repo_id)
+        head_ref = key[0]
+        branch = head_ref[len("refs/heads/"):] if head_ref and head_ref.startswith("refs/heads/") else None
+        return {
+            "repoId": repo_id,
+            "name": metadata.name if metadata and metadata.name else repo_path.name,
+            "currentBranch": branch,
+            "profile": metadata.profile.get("name") if metadata and metadata.profile else None,
+        }
+
+    @staticmethod
+    def _full_summary(repo_id: str, base_path: Path, metadata: Optional[RepoMetadata] = None) -> Dict[str, Any]:
+        return GitRepo(repo_id, base_path, metadata=metadata).get_summary()
+
+    def summaries(
+        self,
+        base_path: Path,
+        repo_ids: Iterable[str],
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        repo_ids = list(repo_ids)
+        selected = set(fields) if fields is not None else None
+        need_counts = selected is None or bool(selected & COUNT_FIELDS)
+        entries = self._load_entries()
+
+        results: Dict[str, Dict[str, Any]] = {}
+        stale: Dict[str, List[Any]] = {}
+        light: Dict[str, List[Any]] = {}
+        versions = RepoMetadata.versions(repo_ids)
+        for repo_id in repo_ids:
+            key = self.fingerprint(base_path / repo_id, versions.get(repo_id))
+            if key is None:
+                continue
+            with self._lock:
+                entry = entries.get(repo_id)
+            if entry is not None and entry.get("key") == key:
+                results[repo_id] = entry["summary"]
+            elif need_counts:
+                stale[repo_id] = key
+            else:
+                light[repo_id] = key
+
+        # With the SQLite store, metadata for every summary still to build comes from one query.
+        stored = RepoMetadata.load_many([*stale, *light]) if stale or light else {}
+        for repo_id, key in light.items():
+            results[repo_id] = self._light_summary(repo_id, base_path / repo_id, key, stored.get(repo_id))
+
+        if stale:
+            futures = {
+                # Run each refresh in a copy of the request's context so a request profile includes it.
+                repo_id: self._executor.submit(
+                    contextvars.copy_context().run, self._full_summary, repo_id, base_path, stored.get(repo_id)
+                )
+                for repo_id in stale
+            }
+            refreshed: Dict[str, Dict[str, Any]] = {}
+            for repo_id, future in futures.items():
+                try:
+                    summary = future.result()
+                except Exception:
+                    continue
+                results[repo_id] = summary
+                refreshed[repo_id] = {"key": stale[repo_id], "summary": summary}
+            if refreshed:
+                with self._lock:
+                    entries.update(refreshed)
+                    self._save_entries()
+
+        ordered = [results[repo_id] for repo_id in repo_ids if repo_id in results]
+        if selected is None:
+            return [dict(summary) for summary in ordered]
+        selected.add("repoId")
+        return [{field: summary[field] for field in SUMMARY_FIELDS if field in selected} for summary in ordered]
+
+    def prune(self, repo_ids: Iterable[str]) -> None:
+        keep = set(repo_ids)
+        entries = self._load_entries()
+        with self._lock:
+            removed = [repo_id for repo_id in entries if repo_id not in keep]
+            for repo_id in removed:
+                del entries[repo_id]
+            if removed:
+                self._save_entries()
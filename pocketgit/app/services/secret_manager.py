@@ -4,21 +4,62 @@ import base64
 import hashlib
 import json
 import os
+import threading
+import time
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from cryptography.fernet import Fernet, InvalidToken
+from ..utils.fs_utils import atomic_write_text, file_lock
+from ..utils.lazy import lazy_import, lazy_service
+from .metadata_store import MetadataStore, metadata_store
+
+fernet = lazy_import("cryptography.fernet")
+
+SECRET_FORMAT_VERSION = 2
+UNREADABLE_MASK_LENGTH = 6
+
+
+@dataclass
+class SecretRecord:
+    value: str
+    mask_length: int
+    key_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Optional["SecretRecord"]:
+        if not isinstance(data, dict) or not isinstance(data.get("value"), str):
+            return None
+        mask_length = data.get("mask")
+        if not isinstance(mask_length, int):
+            mask_length = UNREADABLE_MASK_LENGTH
+        return cls(value=data["value"], mask_length=mask_length, key_id=data.get("key"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"v": SECRET_FORMAT_VERSION, "key": self.key_id, "mask": self.mask_length, "value": self.value}
 
 
 class SecretManager:
-    def __init__(self, base_path: Path):
+    CREDENTIALS_CACHE_TTL_SECONDS = float(os.getenv("POCKETGIT_CREDENTIALS_CACHE_TTL", "30"))
+
+    def __init__(self, base_path: Path, store: Optional[MetadataStore] = None):
         self.base_path = base_path
+        self.store = store
         self.base_path.mkdir(parents=True, exist_ok=True)
-        self._fernet = Fernet(self._load_key())
+        keys = self._load_keys()
+        self._fernet = fernet.MultiFernet([fernet.Fernet(key) for key in keys])
+        self._primary_key_id = self._key_id(keys[0])
+        self._has_previous_keys = len(keys) > 1
+        self._credentials_cache: Dict[str, Tuple[float, Optional[Dict[str, str]]]] = {}
+        self._credentials_lock = threading.Lock()
+        self._rotation_thread: Optional[threading.Thread] = None
 
     def _key_path(self) -> Path:
         return self.base_path / ".key"
 
+    def _lock_path(self) -> Path:
+        return self.base_path / ".lock"
+
     def _load_key(self) -> bytes:
         env_value = os.getenv("POCKETGIT_SECRET_KEY")
         if env_value:
@@ -26,96 +67,223 @@ class SecretManager:
         key_file = self._key_path()
         if key_file.exists():
             return key_file.read_bytes()
-        key = Fernet.generate_key()
+        key = fernet.Fernet.generate_key()
         key_file.write_bytes(key)
         return key
 
+    @staticmethod
+    def _previous_keys() -> List[str]:
+        previous = os.getenv("POCKETGIT_SECRET_KEY_PREVIOUS", "")
+        return [value.strip() for value in previous.split(",") if value.strip()]
+
+    @classmethod
+    def rotation_configured(cls) -> bool:
+        return bool(cls._previous_keys())
+
+    def _load_keys(self) -> List[bytes]:
+        return [self._load_key()] + [self._ensure_key(value) for value in self._previous_keys()]
+
     @staticmethod
     def _ensure_key(value: str) -> bytes:
         raw = value.encode("utf-8")
         try:
-            Fernet(raw)  # Validate key format
+            fernet.Fernet(raw)  # Validate key format
             return raw
         except ValueError:
             digest = hashlib.sha256(raw).digest()
             return base64.urlsafe_b64encode(digest)
 
+    @staticmethod
+    def _key_id(key: bytes) -> str:
+        return hashlib.sha256(key).hexdigest()[:16]
+
+    @staticmethod
+    def _mask_length(plain: str) -> int:
+        if not plain:
+            return 0
+        return min(10, max(4, len(plain)))
+
     def _repo_file(self, repo_id: str) -> Path:
         return self.base_path / f"{repo_id}.json"
 
-    def _load_repo_secrets(self, repo_id: str) -> Dict[str, str]:
+    def _encrypt(self, value: str) -> SecretRecord:
+        encrypted = self._fernet.encrypt(value.encode("utf-8")).decode("utf-8")
+        return SecretRecord(value=encrypted, mask_length=self._mask_length(value), key_id=self._primary_key_id)
+
+    def _upgrade_legacy(self, encrypted: str) -> SecretRecord:
+        plain = self._decrypt(encrypted)
+        if plain is None:
+            return SecretRecord(value=encrypted, mask_length=UNREADABLE_MASK_LENGTH)
+        return SecretRecord(value=encrypted, mask_length=self._mask_length(plain))
+
+    def _read_repo_file(self, repo_id: str) -> Tuple[Dict[str, SecretRecord], bool]:
         path = self._repo_file(repo_id)
         if not path.exists():
-            return {}
+            return {}, False
         try:
             raw = path.read_text(encoding="utf-8")
             if not raw.strip():
-                return {}
+                return {}, False
             data = json.loads(raw)
-            if isinstance(data, dict):
-                return {str(k): str(v) for k, v in data.items()}
-            return {}
         except (OSError, json.JSONDecodeError):
-            return {}
+            return {}, False
+        if not isinstance(data, dict):
+            return {}, False
+        if data.get("version") == SECRET_FORMAT_VERSION and isinstance(data.get("secrets"), dict):
+            records = {}
+            for name, entry in data["secrets"].items():
+                record = SecretRecord.from_dict(entry)
+                if record:
+                    records[str(name)] = record
+            return records, False
+        return {str(k): self._upgrade_legacy(str(v)) for k, v in data.items()}, True
 
-    def _save_repo_secrets(self, repo_id: str, secrets: Dict[str, str]) -> None:
+    def _load_repo_secrets(self, repo_id: str) -> Dict[str, SecretRecord]:
+        if self.store is not None:
+            records: Dict[str, SecretRecord] = {}
+            legacy: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for name, row in self.store.get_secrets(repo_id).items():
+                if row.get("mask_length") is None:
+                    records[name] = self._upgrade_legacy(row["value"])
+                    legacy[name] = (row["value"], asdict(records[name]))
+                else:
+                    records[name] = SecretRecord(row["value"], row["mask_length"], row.get("key_id"))
+            if legacy:
+                # Conditional, so a secret set since the read is not overwritten with the old value.
+                self.store.replace_secrets(repo_id, legacy)
+            return records
+        records, is_legacy = self._read_repo_file(repo_id)
+        if is_legacy:
+            with file_lock(self._lock_path()):
+                records, is_legacy = self._read_repo_file(repo_id)
+                if is_legacy:
+                    self._save_repo_secrets(repo_id, records)
+        return records
+
+    def _save_repo_secrets(self, repo_id: str, secrets: Dict[str, SecretRecord]) -> None:
         path = self._repo_file(repo_id)
-        payload = json.dumps(secrets, indent=2, sort_keys=True)
-        path.write_text(payload, encoding="utf-8")
+        payload = {
+            "version": SECRET_FORMAT_VERSION,
+            "secrets": {name: record.to_dict() for name, record in secrets.items()},
+        }
+        atomic_write_text(path, json.dumps(payload, indent=2, sort_keys=True))
 
     def set_secret(self, repo_id: str, name: str, value: str) -> None:
-        secrets = self._load_repo_secrets(repo_id)
-        encrypted = self._fernet.encrypt(value.encode("utf-8")).decode("utf-8")
-        secrets[name] = encrypted
-        self._save_repo_secrets(repo_id, secrets)
+        record = self._encrypt(value)
+        if self.store is not None:
+            self.store.set_secret(repo_id, name, record.value, record.mask_length, record.key_id)
+        else:
+            with file_lock(self._lock_path()):
+                secrets, _ = self._read_repo_file(repo_id)
+                secrets[name] = record
+                self._save_repo_secrets(repo_id, secrets)
+        self._invalidate_credentials(repo_id)
 
     def delete_secret(self, repo_id: str, name: str) -> bool:
-        secrets = self._load_repo_secrets(repo_id)
-        if name not in secrets:
-            return False
-        secrets.pop(name, None)
-        self._save_repo_secrets(repo_id, secrets)
-        return True
+        if self.store is not None:
+            removed = self.store.delete_secret(repo_id, name)
+        else:
+            with file_lock(self._lock_path()):
+                secrets, _ = self._read_repo_file(repo_id)
+                removed = name in secrets
+                if removed:
+                    secrets.pop(name, None)
+                    self._save_repo_secrets(repo_id, secrets)
+        self._invalidate_credentials(repo_id)
+        return removed
 
     def list_secrets(self, repo_id: str) -> Dict[str, str]:
         secrets = self._load_repo_secrets(repo_id)
-        visible: Dict[str, str] = {}
-        for key, encrypted in secrets.items():
-            visible[key] = self._mask_secret(encrypted)
-        return visible
+        return {name: "*" * record.mask_length for name, record in secrets.items()}
 
-    def _mask_secret(self, encrypted_value: str) -> str:
-        try:
-            decrypted = self._fernet.decrypt(encrypted_value.encode("utf-8"))
-        except (InvalidToken, ValueError):
-            return "******"
-        plain = decrypted.decode("utf-8", errors="ignore")
-        if not plain:
-            return ""
-        length = min(10, max(4, len(plain)))
-        return "*" * length
-
-    def get_secret_value(self, repo_id: str, name: str) -> Optional[str]:
-        secrets = self._load_repo_secrets(repo_id)
-        encrypted = secrets.get(name)
+    def _decrypt(self, encrypted: Optional[str]) -> Optional[str]:
         if not encrypted:
             return None
         try:
             decrypted = self._fernet.decrypt(encrypted.encode("utf-8"))
-        except (InvalidToken, ValueError):
+        except (fernet.InvalidToken, ValueError):
             return None
         return decrypted.decode("utf-8")
 
+    def _decrypt_record(self, record: Optional[SecretRecord]) -> Optional[str]:
+        return self._decrypt(record.value) if record else None
+
+    def get_secret_value(self, repo_id: str, name: str) -> Optional[str]:
+        secrets = self._load_repo_secrets(repo_id)
+        return self._decrypt_record(secrets.get(name))
+
+    def _invalidate_credentials(self, repo_id: str) -> None:
+        with self._credentials_lock:
+            self._credentials_cache.pop(repo_id, None)
+
     def get_http_credentials(self, repo_id: str) -> Optional[Dict[str, str]]:
-        username = self.get_secret_value(repo_id, "GIT_USERNAME")
-        password = self.get_secret_value(repo_id, "GIT_PASSWORD")
-        token = self.get_secret_value(repo_id, "GIT_TOKEN")
+        now = time.monotonic()
+        with self._credentials_lock:
+            cached = self._credentials_cache.get(repo_id)
+        if cached is not None and cached[0] > now:
+            return dict(cached[1]) if cached[1] else None
+
+        secrets = self._load_repo_secrets(repo_id)
+        username = self._decrypt_record(secrets.get("GIT_USERNAME"))
+        password = self._decrypt_record(secrets.get("GIT_PASSWORD"))
+        token = self._decrypt_record(secrets.get("GIT_TOKEN"))
+        credentials: Optional[Dict[str, str]] = None
         if username and (password or token):
-            return {"username": username, "password": password or token}
-        if token and not username:
-            return {"username": "token", "password": token}
-        return None
+            credentials = {"username": username, "password": password or token}
+        elif token and not username:
+            credentials = {"username": "token", "password": token}
+
+        with self._credentials_lock:
+            self._credentials_cache[repo_id] = (now + self.CREDENTIALS_CACHE_TTL_SECONDS, credentials)
+        return dict(credentials) if credentials else None
+
+    def _rotate_records(self, records: Dict[str, SecretRecord]) -> Dict[str, SecretRecord]:
+        rotated: Dict[str, SecretRecord] = {}
+        for name, record in records.items():
+            if record.key_id == self._primary_key_id:
+                continue
+            try:
+                token = self._fernet.rotate(record.value.encode("utf-8")).decode("utf-8")
+            except fernet.InvalidToken:
+                continue
+            rotated[name] = SecretRecord(value=token, mask_length=record.mask_length, key_id=self._primary_key_id)
+        return rotated
+
+    def rotate_keys(self) -> int:
+        """Re-encrypt every secret that is not yet on the primary key, one repository at a time."""
+
+        total = 0
+        if self.store is not None:
+            for repo_id in self.store.list_secret_repo_ids():
+                records = self._load_repo_secrets(repo_id)
+                rotated = self._rotate_records(records)
+                if rotated:
+                    # Secrets set while rotating are already on the primary key; the update skips them.
+                    total += self.store.replace_secrets(
+                        repo_id, {name: (records[name].value, asdict(record)) for name, record in rotated.items()}
+                    )
+            return total
+        for path in sorted(self.base_path.glob("*.json")):
+            repo_id = path.stem
+            with file_lock(self._lock_path()):
+                records, _ = self._read_repo_file(repo_id)
+                rotated = self._rotate_records(records)
+                if rotated:
+                    records.update(rotated)
+                    self._save_repo_secrets(repo_id, records)
+                    total += len(rotated)
+        return total
+
+    def start_key_rotation(self) -> None:
+        if not self._has_previous_keys or self._rotation_thread is not None:
+            return
+        self._rotation_thread = threading.Thread(
+            target=self.rotate_keys,
+            name="pocketgit-secret-rotation",
+            daemon=True,
+        )
+        self._rotation_thread.start()
 
 
 base_secrets_path = Path(__file__).resolve().parent.parent.parent / "secrets"
-secret_manager = SecretManager(base_secrets_path)
+secret_manager = lazy_service(lambda: SecretManager(base_secrets_path, metadata_store))
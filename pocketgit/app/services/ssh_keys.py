@@ -2,12 +2,18 @@ from __future__ import annotations
 
 import json
 import os
+import shlex
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional
 from uuid import uuid4
 
+from ..utils.lazy import lazy_service
+from .metadata_store import MetadataStore, metadata_store
+from .ssh_pool import SSHConnectionPool, parse_ssh_target, ssh_connection_pool
+
 
 @dataclass
 class SSHKeyMetadata:
@@ -34,8 +40,15 @@ class SSHKeyMetadata:
 
 
 class SSHKeyManager:
-    def __init__(self, base_path: Path):
+    def __init__(
+        self,
+        base_path: Path,
+        store: Optional[MetadataStore] = None,
+        connection_pool: Optional[SSHConnectionPool] = None,
+    ):
         self.base_path = base_path
+        self.store = store
+        self.connection_pool = connection_pool or ssh_connection_pool
         self.base_path.mkdir(parents=True, exist_ok=True)
 
     def _key_path(self, key_id: str) -> Path:
@@ -45,6 +58,11 @@ class SSHKeyManager:
         return self.base_path / f"{key_id}.json"
 
     def list_keys(self) -> List[SSHKeyMetadata]:
+        if self.store is not None:
+            return [
+                SSHKeyMetadata(id=row["id"], name=row["name"], created_at=row["created_at"])
+                for row in self.store.list_ssh_keys()
+            ]
         keys: List[SSHKeyMetadata] = []
         for meta_path in sorted(self.base_path.glob("*.json")):
             metadata = SSHKeyMetadata.from_file(meta_path)
@@ -61,10 +79,15 @@ class SSHKeyManager:
         os.chmod(key_path, 0o600)
         created_at = datetime.now(tz=timezone.utc).isoformat()
         metadata = SSHKeyMetadata(id=key_id, name=name, created_at=created_at)
-        metadata.to_file(meta_path)
+        if self.store is not None:
+            self.store.put_ssh_key(key_id, name, created_at)
+        else:
+            metadata.to_file(meta_path)
         return metadata
 
     def delete_key(self, key_id: str) -> None:
+        if self.store is not None:
+            self.store.delete_ssh_key(key_id)
         for path in self._iter_key_files(key_id):
             try:
                 path.unlink()
@@ -75,16 +98,28 @@ class SSHKeyManager:
         yield self._key_path(key_id)
         yield self._metadata_path(key_id)
 
-    def get_env_for_key(self, key_id: Optional[str]) -> Optional[dict]:
+    def get_env_for_key(self, key_id: Optional[str], ssh_options: Optional[List[str]] = None) -> Optional[dict]:
         if not key_id:
             return None
         key_path = self._key_path(key_id)
         if not key_path.exists():
             return None
         env = os.environ.copy()
-        env["GIT_SSH_COMMAND"] = f"ssh -i \"{key_path}\" -o StrictHostKeyChecking=no"
+        command = f"ssh -i \"{key_path}\" -o StrictHostKeyChecking=no"
+        if ssh_options:
+            command = " ".join([command, *(shlex.quote(option) for option in ssh_options)])
+        env["GIT_SSH_COMMAND"] = command
         return env
 
+    @contextmanager
+    def session(self, key_id: Optional[str], remote_url: Optional[str]) -> Iterator[Optional[dict]]:
+        target = parse_ssh_target(remote_url)
+        if not key_id or target is None or not self._key_path(key_id).exists():
+            yield self.get_env_for_key(key_id)
+            return
+        with self.connection_pool.lease(target, key_id) as ssh_options:
+            yield self.get_env_for_key(key_id, ssh_options)
+
     def get_key_path(self, key_id: str) -> Path:
         key_path = self._key_path(key_id)
         if not key_path.exists():
@@ -93,4 +128,4 @@ class SSHKeyManager:
 
 
 keys_base_path = Path(__file__).resolve().parent.parent / "keys"
-ssh_key_manager = SSHKeyManager(keys_base_path)
+ssh_key_manager = lazy_service(lambda: SSHKeyManager(keys_base_path, metadata_store))
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class SSHPoolBusyError(TimeoutError):
+    """No SSH connection slot to the host freed up in time; the caller should retry later."""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Too many concurrent SSH connections to {host}")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class SSHTarget:
+    host: str
+    user: Optional[str] = None
+    port: Optional[int] = None
+
+
+def parse_ssh_target(url: Optional[str]) -> Optional[SSHTarget]:
+    if not url:
+        return None
+    if url.startswith("ssh://"):
+        parsed = urlparse(url)
+        if not parsed.hostname:
+            return None
+        return SSHTarget(host=parsed.hostname, user=parsed.username, port=parsed.port)
+    if "://" in url or ":" not in url:
+        return None
+    # scp-like syntax: [user@]host:path
+    address = url.split(":", 1)[0]
+    user, _, host = address.rpartition("@")
+    if not host:
+        return None
+    return SSHTarget(host=host, user=user or None)
+
+
+class SSHConnectionPool:
+    CLEANUP_INTERVAL_SECONDS = 60.0
+    ACQUIRE_TIMEOUT_SECONDS = 300.0
+    RETRY_AFTER_SECONDS = 10.0
+
+    def __init__(self, control_dir: Path, persist: str = "60s", max_per_host: int = 4, enabled: bool = True):
+        self.control_dir = control_dir
+        self.persist = persist
+        self.max_per_host = max_per_host
+        self.enabled = enabled
+        self._slots: Dict[Tuple[str, Optional[int]], threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def control_path(self, target: SSHTarget, key_id: str) -> Path:
+        # Unix socket paths are limited to ~100 bytes, so the name is a short digest.
+        digest = hashlib.sha1(f"{target.user}@{target.host}:{target.port}/{key_id}".encode("utf-8")).hexdigest()
+        return self.control_dir / digest[:20]
+
+    def _host_slots(self, target: SSHTarget) -> threading.BoundedSemaphore:
+        # Keyed by host and port only: every key shares the host's cap, unlike the ControlPath.
+        key = (target.host, target.port)
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = threading.BoundedSemaphore(self.max_per_host)
+                self._slots[key] = slots
+            return slots
+
+    def _ensure_control_dir(self) -> None:
+        self.control_dir.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.control_dir, 0o700)
+
+    @staticmethod
+    def _socket_alive(path: Path) -> bool:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.settimeout(1.0)
+            client.connect(str(path))
+            return True
+        except OSError:
+            return False
+        finally:
+            client.close()
+
+    def _discard_if_dead(self, path: Path) -> bool:
+        try:
+            mode = path.lstat().st_mode
+        except FileNotFoundError:
+            return False
+        if stat.S_ISSOCK(mode) and self._socket_alive(path):
+            return False
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def cleanup(self) -> int:
+        if not self.control_dir.exists():
+            return 0
+        removed = 0
+        for path in self.control_dir.iterdir():
+            if self._discard_if_dead(path):
+                removed += 1
+        return removed
+
+    def _maybe_cleanup(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_cleanup < self.CLEANUP_INTERVAL_SECONDS:
+                return
+            self._last_cleanup = now
+        self.cleanup()
+
+    @contextmanager
+    def lease(self, target: SSHTarget, key_id: str) -> Iterator[List[str]]:
+        """Yield ssh options that share one master connection per (host, key), capped per host."""
+
+        if not self.enabled:
+            yield []
+            return
+        slots = self._host_slots(target)
+        if not slots.acquire(timeout=self.ACQUIRE_TIMEOUT_SECONDS):
+            raise SSHPoolBusyError(target.host, self.RETRY_AFTER_SECONDS)
+        try:
+            self._ensure_control_dir()
+            self._maybe_cleanup()
+            control_path = self.control_path(target, key_id)
+            self._discard_if_dead(control_path)
+            yield [
+                "-o",
+                "ControlMaster=auto",
+                "-o",
+                f"ControlPath={control_path}",
+                "-o",
+                f"ControlPersist={self.persist}",
+            ]
+        finally:
+            slots.release()
+
+
+default_control_dir = Path(tempfile.gettempdir()) / f"pocketgit-ssh-{os.getuid() if hasattr(os, 'getuid') else 'user'}"
+ssh_connection_pool = SSHConnectionPool(
+    Path(os.getenv("POCKETGIT_SSH_CONTROL_DIR", str(default_control_dir))),
+    persist=os.getenv("POCKETGIT_SSH_CONTROL_PERSIST", "60s"),
+    max_per_host=int(os.getenv("POCKETGIT_SSH_MAX_PER_HOST", "4")),
+    enabled=os.getenv("POCKETGIT_SSH_MULTIPLEX", "1") != "0",
+)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ..utils.fs_utils import atomic_write_text, file_lock
+from ..utils.git_refs import read_head
+from ..utils.lazy import lazy_import
+from ..utils.metrics import track_executor
+
+if TYPE_CHECKING:
+    from git import Repo
+
+git = lazy_import("git")
+
+
+class WorktreeManager:
+    """Keep one ``git worktree`` per branch a user has switched to, so switching only moves a pointer.
+
+    State lives in ``.git/pocketgit/worktrees.json``: the active branch (``None`` for the main
+    working tree) and, per branch, the worktree directory, when it was last used and its size on
+    disk. Sizes are measured in the background when a worktree is created and whenever it goes
+    idle, so a switch only sums the recorded sizes to enforce the budget.
+    """
+
+    STATE_DIRNAME = "pocketgit"
+    STATE_FILENAME = "worktrees.json"
+
+    def __init__(self, enabled: bool, budget_bytes: int):
+        self.enabled = enabled
+        self.budget_bytes = budget_bytes
+        self._size_executor: Optional[ThreadPoolExecutor] = None
+        if enabled:
+            self._size_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pocketgit-worktree-size")
+            track_executor("worktree_size", self._size_executor)
+
+    def _state_dir(self, repo_path: Path) -> Path:
+        return repo_path / ".git" / self.STATE_DIRNAME
+
+    def _worktrees_dir(self, repo_path: Path) -> Path:
+        return self._state_dir(repo_path) / "worktrees"
+
+    def _read_state(self, repo_path: Path) -> Dict[str, Any]:
+        try:
+            data = json.loads((self._state_dir(repo_path) / self.STATE_FILENAME).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if not isinstance(data, dict) or not isinstance(data.get("worktrees"), dict):
+            data = {"active": None, "worktrees": {}}
+        return data
+
+    def _write_state(self, repo_path: Path, state: Dict[str, Any]) -> None:
+        atomic_write_text(self._state_dir(repo_path) / self.STATE_FILENAME, json.dumps(state, indent=2, sort_keys=True))
+
+    @staticmethod
+    def _slug(branch: str) -> str:
+        digest = hashlib.sha1(branch.encode("utf-8")).hexdigest()[:8]
+        return f"{re.sub(r'[^A-Za-z0-9._-]+', '-', branch)[:40]}-{digest}"
+
+    def active_path(self, repo_path: Path) -> Path:
+        """Return the working tree requests should operate on; the repository root unless a worktree is active."""
+
+        if not self.enabled:
+            return repo_path
+        state = self._read_state(repo_path)
+        entry = state["worktrees"].get(state.get("active") or "")
+        if not entry:
+            return repo_path
+        path = self._worktrees_dir(repo_path) / entry["path"]
+        return path if (path / ".git").exists() else repo_path
+
+    def switch(self, repo: Repo, repo_path: Path, branch: str) -> Path:
+        measure: List[str] = []
+        with file_lock(self._state_dir(repo_path) / "worktrees.lock"):
+            state = self._read_state(repo_path)
+            previous = state.get("active")
+            main_ref, _ = read_head(repo_path / ".git")
+            if main_ref == f"refs/heads/{branch}":
+                state["active"] = None
+                path = repo_path
+            else:
+                entry = state["worktrees"].get(branch)
+                path = self._worktrees_dir(repo_path) / entry["path"] if entry else None
+                if path is None or not (path / ".git").exists():
+                    if entry:
+                        repo.git.worktree("prune")
+                    slug = self._slug(branch)
+                    path = self._worktrees_dir(repo_path) / slug
+                    repo.git.worktree("add", str(path), branch)
+                    entry = {"path": slug}
+                    state["worktrees"][branch] = entry
+                    measure.append(branch)
+                entry["lastUsed"] = time.time()
+                state["active"] = branch
+            if previous in state["worktrees"] and previous != state["active"]:
+                measure.append(previous)
+            self._reclaim(repo, repo_path, state)
+            self._write_state(repo_path, state)
+        for measured in measure:
+            self._size_executor.submit(self._measure, repo_path, measured)
+        return path
+
+    def release(self, repo: Repo, repo_path: Path, branch: str) -> None:
+        """Remove the worktree holding ``branch`` (if any) so the branch can be deleted."""
+
+        with file_lock(self._state_dir(repo_path) / "worktrees.lock"):
+            state = self._read_state(repo_path)
+            if branch == state.get("active") or branch not in state["worktrees"]:
+                return
+            self._remove(repo, repo_path, state, branch)
+            self._write_state(repo_path, state)
+
+    def _remove(self, repo: Repo, repo_path: Path, state: Dict[str, Any], branch: str) -> bool:
+        entry = state["worktrees"][branch]
+        path = self._worktrees_dir(repo_path) / entry["path"]
+        if (path / ".git").exists():
+            try:
+                # Without --force git refuses to drop a worktree with uncommitted changes.
+                repo.git.worktree("remove", str(path))
+            except git.GitCommandError:
+                return False
+        state["worktrees"].pop(branch, None)
+        return True
+
+    @staticmethod
+    def _disk_usage(path: Path) -> int:
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+        return total
+
+    def _measure(self, repo_path: Path, branch: str) -> None:
+        """Record the size of ``branch``'s worktree; runs on the size executor, off the request path."""
+
+        lock_path = self._state_dir(repo_path) / "worktrees.lock"
+        try:
+            with file_lock(lock_path):
+                entry = self._read_state(repo_path)["worktrees"].get(branch)
+            if not entry:
+                return
+            size = self._disk_usage(self._worktrees_dir(repo_path) / entry["path"])
+            with file_lock(lock_path):
+                state = self._read_state(repo_path)
+                current = state["worktrees"].get(branch)
+                if not current or current["path"] != entry["path"]:
+                    return
+                current["size"] = size
+                self._write_state(repo_path, state)
+        except OSError:
+            pass  # The repository was deleted meanwhile; there is nothing left to account for.
+
+    def _reclaim(self, repo: Repo, repo_path: Path, state: Dict[str, Any]) -> List[str]:
+        idle = sorted(
+            (branch for branch in state["worktrees"] if branch != state.get("active")),
+            key=lambda branch: state["worktrees"][branch].get("lastUsed", 0),
+        )
+        # Worktrees whose first measurement is still pending count as empty until it lands.
+        usage = {branch: entry.get("size", 0) for branch, entry in state["worktrees"].items()}
+        total = sum(usage.values())
+        removed: List[str] = []
+        for branch in idle:
+            if total <= self.budget_bytes:
+                break
+            if self._remove(repo, repo_path, state, branch):
+                total -= usage[branch]
+                removed.append(branch)
+        return removed
+
+
+worktree_manager = WorktreeManager(
+    enabled=os.getenv("POCKETGIT_WORKTREES", "0") == "1",
+    budget_bytes=int(os.getenv("POCKETGIT_WORKTREE_BUDGET_MB", "1024")) * 1024 * 1024,
+)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+ENABLED = os.getenv("POCKETGIT_CONDITIONAL_REQUESTS", "1") != "0"
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the parts of a validator; equal parts give equal tags across workers."""
+
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag`` (RFC 9110, section 13.1.2)."""
+
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """Return a 304 response when the client already holds ``etag``, else ``None``."""
+
+    if etag is None or not matches(request.headers.get("if-none-match"), etag):
+        return None
+    # The 200 for the same resource varies on Accept-Encoding (see CompressionMiddleware), and a 304
+    # must carry the same Vary so shared caches key both responses alike.
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"},
+    )
+
+
+def tag(response: Response, etag: Optional[str]) -> None:
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
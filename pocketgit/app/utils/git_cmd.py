@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence, Union
+
+from .lazy import lazy_import
+from .metrics import git_subcommand, observe_git_command
+from .profiling import git_frame
+from .tracing import tracer
+
+git_util = lazy_import("git.util")
+
+
+class GitCall:
+    """Bookkeeping for one git subprocess: its duration metric and its trace span."""
+
+    def __init__(self, args: Sequence[Any], cwd: Optional[Union[str, Path]], streamed: bool = False):
+        self.args = args
+        self.streamed = streamed
+        self.exit_code: Optional[int] = None
+        self.bytes_out: Optional[int] = None
+        self._start = time.perf_counter()
+        self.span = None
+        if tracer.enabled:
+            argv = git_util.remove_password_if_present([str(arg) for arg in args])
+            self.span = tracer.start_span(f"git {git_subcommand(args)}", {"git.argv": argv, "git.cwd": str(cwd or "")})
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if not self.streamed:
+            observe_git_command(self.args, time.perf_counter() - self._start, error is None and self.exit_code == 0)
+        if self.span is not None:
+            self.span.set("git.exit_code", self.exit_code)
+            self.span.set("git.bytes_out", self.bytes_out)
+            self.span.finish(error)
+
+
+def run_git(
+    repo_path: Optional[Path],
+    args: Sequence[str],
+    env: Optional[Mapping[str, str]] = None,
+    check: bool = True,
+) -> str:
+    """Run a git subcommand inside ``repo_path`` (or the current directory) and return its standard output."""
+
+    call = GitCall(args, repo_path)
+    try:
+        with git_frame(args):
+            result = subprocess.run(
+                ["git", *args],
+                cwd=repo_path,
+                capture_output=True,
+                text=True,
+                check=check,
+                env=dict(env) if env is not None else None,
+            )
+    except subprocess.CalledProcessError as exc:
+        call.exit_code = exc.returncode
+        call.bytes_out = len(exc.stdout or "")
+        call.finish(exc)
+        raise
+    except OSError as exc:
+        call.finish(exc)
+        raise
+    call.exit_code = result.returncode
+    call.bytes_out = len(result.stdout)
+    call.finish()
+    return result.stdout
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Union
+
+from git import Git, Repo
+from git.exc import GitCommandError
+
+from .git_cmd import GitCall
+from .metrics import count_streamed_git_command
+from .profiling import git_frame
+
+
+class TracedAutoInterrupt(Git.AutoInterrupt):
+    """GitPython's streamed process handle, closing its trace span once the process is waited for or killed."""
+
+    __slots__ = ("call",)
+
+    def __init__(self, proc: Any, args: Any) -> None:
+        super().__init__(proc, args)
+        self.call: Optional[GitCall] = None
+
+    def wait(self, stderr: Union[None, str, bytes] = b"") -> int:
+        try:
+            status = super().wait(stderr)
+        except GitCommandError as exc:
+            self._finish_call(exc.status if isinstance(exc.status, int) else None, exc)
+            raise
+        self._finish_call(status)
+        return status
+
+    def _terminate(self) -> None:
+        super()._terminate()
+        self._finish_call(self.status)
+
+    def _finish_call(self, status: Optional[int], error: Optional[BaseException] = None) -> None:
+        call, self.call = self.call, None
+        if call is not None:
+            call.exit_code = status
+            call.finish(error)
+
+
+class MeteredGit(Git):
+    """GitPython's command wrapper, timing and tracing each git subprocess it runs."""
+
+    AutoInterrupt = TracedAutoInterrupt
+
+    def execute(self, command: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(command, str):
+            return super().execute(command, *args, **kwargs)
+        if kwargs.get("as_process"):
+            count_streamed_git_command(command)
+            # Persistent ``cat-file --batch`` readers live as long as the repository object; leave them untraced.
+            persistent = any(str(arg).startswith("--batch") for arg in command)
+            call = None if persistent else GitCall(command, self._working_dir, streamed=True)
+            process = super().execute(command, *args, **kwargs)
+            if isinstance(process, TracedAutoInterrupt):
+                process.call = call
+            return process
+        call = GitCall(command, self._working_dir)
+        try:
+            with git_frame(command):
+                result = super().execute(command, *args, **kwargs)
+        except GitCommandError as exc:
+            call.exit_code = exc.status if isinstance(exc.status, int) else None
+            call.finish(exc)
+            raise
+        except OSError as exc:
+            call.finish(exc)
+            raise
+        output = result[1] if isinstance(result, tuple) else result
+        call.exit_code = result[0] if isinstance(result, tuple) else 0
+        call.bytes_out = len(output) if isinstance(output, (str, bytes)) else None
+        call.finish()
+        return result
+
+
+class MeteredRepo(Repo):
+    GitCommandWrapperType = MeteredGit
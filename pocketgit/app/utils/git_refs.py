@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+MAX_SYMREF_DEPTH = 5
+
+
+def resolve_git_dir(repo_path: Path) -> Optional[Path]:
+    """Return the git directory of a work tree, following ``gitdir:`` files."""
+
+    dot_git = repo_path / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    try:
+        content = dot_git.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    git_dir = Path(content[len("gitdir:"):].strip())
+    if not git_dir.is_absolute():
+        git_dir = (repo_path / git_dir).resolve()
+    return git_dir if git_dir.is_dir() else None
+
+
+def common_git_dir(git_dir: Path) -> Path:
+    """Return the directory holding shared refs and config (differs from ``git_dir`` for worktrees)."""
+
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    path = Path(common)
+    return path if path.is_absolute() else (git_dir / path).resolve()
+
+
+def _read_ref_file(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8").strip() or None
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def read_packed_refs(common_dir: Path) -> Dict[str, str]:
+    """Parse ``packed-refs`` into a mapping of ref name to object id."""
+
+    refs: Dict[str, str] = {}
+    try:
+        content = (common_dir / "packed-refs").read_text(encoding="utf-8")
+    except OSError:
+        return refs
+    for line in content.splitlines():
+        if not line or line[0] in "#^":
+            continue
+        oid, _, name = line.partition(" ")
+        if name:
+            refs[name.strip()] = oid
+    return refs
+
+
+def resolve_ref(git_dir: Path, ref: str) -> Optional[str]:
+    """Resolve a ref name to an object id from loose refs or ``packed-refs`` without running git."""
+
+    common_dir = common_git_dir(git_dir)
+    packed: Optional[Dict[str, str]] = None
+    for _ in range(MAX_SYMREF_DEPTH):
+        value = None
+        for base in (git_dir, common_dir):
+            value = _read_ref_file(base / ref)
+            if value is not None:
+                break
+        if value is None:
+            if packed is None:
+                packed = read_packed_refs(common_dir)
+            return packed.get(ref)
+        if not value.startswith("ref:"):
+            return value
+        ref = value[len("ref:"):].strip()
+    return None
+
+
+def read_head(git_dir: Path) -> Tuple[Optional[str], Optional[str]]:
+    """Return ``(ref, oid)`` for HEAD; ``ref`` is ``None`` when HEAD is detached."""
+
+    value = _read_ref_file(git_dir / "HEAD")
+    if value is None:
+        return None, None
+    if not value.startswith("ref:"):
+        return None, value
+    ref = value[len("ref:"):].strip()
+    return ref, resolve_ref(git_dir, ref)
+
+
+def _read_branch_config(common_dir: Path, branch: str) -> Dict[str, str]:
+    try:
+        content = (common_dir / "config").read_text(encoding="utf-8")
+    except OSError:
+        return {}
+    section_header = f'[branch "{branch}"]'
+    values: Dict[str, str] = {}
+    in_section = False
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            in_section = line == section_header
+            continue
+        if in_section and "=" in line:
+            key, _, value = line.partition("=")
+            values[key.strip().lower()] = value.strip().strip('"')
+    return values
+
+
+def read_upstream(git_dir: Path, branch: str) -> Optional[str]:
+    """Return the full ref name of a branch's upstream as configured in ``.git/config``."""
+
+    config = _read_branch_config(common_git_dir(git_dir), branch)
+    remote = config.get("remote")
+    merge = config.get("merge")
+    if not remote or not merge:
+        return None
+    if remote == ".":
+        return merge
+    if merge.startswith("refs/heads/"):
+        return f"refs/remotes/{remote}/{merge[len('refs/heads/'):]}"
+    return None
+
+
+def read_tracking(git_dir: Path) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Return ``(head_ref, head_oid, upstream_ref, upstream_oid)`` for the checked-out branch."""
+
+    head_ref, head_oid = read_head(git_dir)
+    upstream = upstream_oid = None
+    if head_ref and head_ref.startswith("refs/heads/"):
+        upstream = read_upstream(git_dir, head_ref[len("refs/heads/"):])
+        if upstream:
+            upstream_oid = resolve_ref(git_dir, upstream)
+    return head_ref, head_oid, upstream, upstream_oid
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Callable, Generic, Optional, TypeVar, cast
+
+T = TypeVar("T")
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    ``except mod.SomeError`` only evaluates the attribute once an exception is being matched, so
+    modules that merely handle a library's errors do not import it.
+    """
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            # import_module holds the per-module import lock, so concurrent first uses import once.
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str, package: Optional[str] = None) -> LazyModule:
+    return LazyModule(importlib.util.resolve_name(name, package))
+
+
+class LazyService(Generic[T]):
+    """A module-level service singleton built by ``factory`` the first time it is used.
+
+    Attribute reads and writes are forwarded to the instance, so callers keep using the module global
+    as before while importing the module no longer creates files, keys or thread pools.
+    """
+
+    __slots__ = ("_factory", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def resolved(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._instance) if self._instance is not None else f"<lazy service {self._factory!r}>"
+
+
+def lazy_service(factory: Callable[[], T]) -> T:
+    """Declare a singleton as ``name = lazy_service(lambda: Service(...))``; typed as the service itself."""
+
+    return cast(T, LazyService(factory))
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from .tracing import tracer
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in sorted(values):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: one count per bucket plus +Inf, then the sum of observations.
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class GaugeFunc(Metric):
+    """A gauge whose values are read from a callback at scrape time, so updating it costs nothing."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._sources: Dict[Labels, Callable[[], float]] = {}
+
+    def track(self, source: Callable[[], float], *labels: str) -> None:
+        with self._lock:
+            self._sources[labels] = source
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            sources = list(self._sources.items())
+        for labels, source in sorted(sources, key=lambda item: item[0]):
+            try:
+                value = float(source())
+            except Exception:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> GaugeFunc:
+        return self._register(GaugeFunc(name, documentation, labelnames))
+
+    def render(self, extra: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, (documentation, value) in (extra or {}).items():
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(enabled=os.getenv("POCKETGIT_METRICS", "1") != "0")
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "pocketgit_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ("route", "method", "status"),
+)
+GIT_OPERATION_SECONDS = registry.histogram(
+    "pocketgit_git_operation_duration_seconds",
+    "Duration of GitRepo operations.",
+    ("operation", "outcome"),
+)
+GIT_COMMAND_SECONDS = registry.histogram(
+    "pocketgit_git_command_duration_seconds",
+    "Duration of git subprocesses by subcommand, including those run through GitPython.",
+    ("command", "outcome"),
+)
+GIT_STREAMED_COMMANDS = registry.counter(
+    "pocketgit_git_streamed_commands_total",
+    "git subprocesses started by GitPython whose output is streamed, so their duration is not observed.",
+    ("command",),
+)
+
+
+def _repo_id(args: Sequence[Any], kwargs: Dict[str, Any]) -> Optional[str]:
+    repo_id = getattr(args[0], "repo_id", None) if args else None
+    if isinstance(repo_id, str):
+        return repo_id
+    # Class methods such as ``clone_to_path`` take the repository id as their first argument.
+    repo_id = kwargs.get("repo_id", args[1] if len(args) > 1 else None)
+    return repo_id if isinstance(repo_id, str) else None
+
+
+def git_operation(operation: str) -> Callable[[F], F]:
+    """Time a ``GitRepo`` method, count it by outcome under ``operation`` and trace it as a span."""
+
+    def decorator(method: F) -> F:
+        span_name = f"GitRepo.{method.__name__}"
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not registry.enabled and not tracer.enabled:
+                return method(*args, **kwargs)
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                with tracer.span(span_name, {"git.operation": operation, "repo.id": _repo_id(args, kwargs)}):
+                    result = method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                if registry.enabled:
+                    GIT_OPERATION_SECONDS.observe(time.perf_counter() - start, operation, outcome)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def git_subcommand(args: Sequence[Any]) -> str:
+    command = "git"
+    values = iter(str(arg) for arg in args)
+    for value in values:
+        if value in ("-c", "-C"):
+            next(values, None)
+        elif not value.startswith("-") and value != "git" and not value.endswith("/git"):
+            command = value
+            break
+    return command
+
+
+def observe_git_command(args: Sequence[Any], seconds: float, ok: bool) -> None:
+    if registry.enabled:
+        GIT_COMMAND_SECONDS.observe(seconds, git_subcommand(args), "ok" if ok else "error")
+
+
+def count_streamed_git_command(args: Sequence[Any]) -> None:
+    if registry.enabled:
+        GIT_STREAMED_COMMANDS.inc(git_subcommand(args))
+
+
+def track_cache(name: str, cache: Any) -> None:
+    """Expose hit/miss counters of an object with ``hits`` and ``misses`` attributes."""
+
+    hits = registry.gauge("pocketgit_cache_hits", "Cache hits since start.", ("cache",))
+    misses = registry.gauge("pocketgit_cache_misses", "Cache misses since start.", ("cache",))
+    ratio = registry.gauge("pocketgit_cache_hit_ratio", "Cache hits divided by lookups since start.", ("cache",))
+    hits.track(lambda: cache.hits, name)
+    misses.track(lambda: cache.misses, name)
+    ratio.track(lambda: cache.hits / max(1, cache.hits + cache.misses), name)
+
+
+def track_executor(name: str, executor: Any) -> None:
+    """Expose the number of tasks waiting in a ``ThreadPoolExecutor`` queue."""
+
+    depth = registry.gauge("pocketgit_executor_queue_depth", "Tasks queued on a background executor.", ("executor",))
+    depth.track(lambda: executor._work_queue.qsize(), name)
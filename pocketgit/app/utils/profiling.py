@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .fs_utils import atomic_write_text
+from .metrics import git_subcommand
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+current_profile: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "pocketgit_profile", default=None
+)
+# Thread id -> synthetic leaf frame for a git subprocess the thread is waiting on.
+_git_frames: Dict[int, str] = {}
+
+
+def sign_token(secret: str, expires_at: int) -> str:
+    digest = hmac.new(secret.encode("utf-8"), str(expires_at).encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{digest}"
+
+
+def verify_token(secret: str, token: Optional[str]) -> bool:
+    """Accept ``<unix expiry>.<hex HMAC-SHA256(secret, expiry)>`` tokens that have not expired."""
+
+    if not secret or not token:
+        return False
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sign_token(secret, int(expires)), token)
+
+
+def _frame_context(frame: Optional[FrameType]) -> Optional[contextvars.Context]:
+    """Find the context a thread is running.
+
+    AnyIO worker threads keep it in a local, asyncio handles in ``_context``, and executor work items
+    submitted as ``copy_context().run`` in the bound method's ``__self__``.
+    """
+
+    while frame is not None:
+        if frame.f_code.co_name in ("run", "_run"):
+            local = frame.f_locals
+            owner = local.get("self")
+            for context in (
+                local.get("context"),
+                getattr(owner, "_context", None),
+                getattr(getattr(owner, "fn", None), "__self__", None),
+            ):
+                if isinstance(context, contextvars.Context):
+                    return context
+        frame = frame.f_back
+    return None
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    parts = Path(code.co_filename).parts[-2:]
+    return f"{code.co_qualname} ({'/'.join(parts)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """Sample the stacks of every thread working on one request into collapsed-stack counts."""
+
+    def __init__(self, profile_id: str, interval: float):
+        self.profile_id = profile_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            context = _frame_context(frame)
+            if context is None or context.get(current_profile) is not self:
+                continue
+            labels: List[str] = []
+            walker: Optional[FrameType] = frame
+            while walker is not None:
+                labels.append(_frame_label(walker))
+                walker = walker.f_back
+            labels.reverse()
+            git_frame = _git_frames.get(thread_id)
+            if git_frame:
+                labels.append(git_frame)
+            self.stacks[";".join(labels)] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"pocketgit-profile-{self.profile_id[:8]}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+@contextmanager
+def git_frame(args: Sequence[Any]) -> Iterator[None]:
+    """Mark the current thread as waiting on git so samples show it as its own ``[git <subcommand>]`` frame."""
+
+    if current_profile.get() is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    previous = _git_frames.get(thread_id)
+    _git_frames[thread_id] = f"[git {git_subcommand(args)}]"
+    try:
+        yield
+    finally:
+        if previous is None:
+            _git_frames.pop(thread_id, None)
+        else:
+            _git_frames[thread_id] = previous
+
+
+class ProfileStore:
+    """Collapsed-stack profiles on disk, newest ``retention`` kept."""
+
+    def __init__(self, base_path: Path, retention: int):
+        self.base_path = base_path
+        self.retention = retention
+        self._lock = threading.Lock()
+
+    def save(self, session: ProfileSession, details: Dict[str, Any]) -> None:
+        metadata = {
+            "profileId": session.profile_id,
+            "createdAt": session.started_at,
+            "samples": sum(session.stacks.values()),
+            "intervalMs": session.interval * 1000,
+            **details,
+        }
+        with self._lock:
+            atomic_write_text(self.base_path / f"{session.profile_id}.collapsed", session.collapsed())
+            atomic_write_text(self.base_path / f"{session.profile_id}.json", json.dumps(metadata))
+            self._trim()
+
+    def _trim(self) -> None:
+        entries = sorted(self.base_path.glob("*.json"), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[: max(0, len(entries) - self.retention)]:
+            for suffix in (".json", ".collapsed"):
+                try:
+                    entry.with_suffix(suffix).unlink()
+                except OSError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for entry in self.base_path.glob("*.json"):
+            try:
+                profiles.append(json.loads(entry.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return sorted(profiles, key=lambda profile: profile.get("createdAt", 0), reverse=True)
+
+    def read(self, profile_id: str) -> str:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            raise FileNotFoundError(profile_id)
+        return (self.base_path / f"{profile_id}.collapsed").read_text(encoding="utf-8")
+
+
+class Profiler:
+    HEADER = "x-pocketgit-profile"
+
+    def __init__(self, secret: str, sample_rate: float, interval: float, store: ProfileStore):
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.store = store
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret) or self.sample_rate > 0
+
+    def should_profile(self, token: Optional[str]) -> bool:
+        if token is not None and verify_token(self.secret, token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def session(self) -> ProfileSession:
+        return ProfileSession(uuid.uuid4().hex, self.interval)
+
+
+project_root = Path(__file__).resolve().parent.parent.parent
+
+profiler = Profiler(
+    secret=os.getenv("POCKETGIT_PROFILE_SECRET", ""),
+    sample_rate=float(os.getenv("POCKETGIT_PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.getenv("POCKETGIT_PROFILE_INTERVAL_MS", "5")) / 1000,
+    store=ProfileStore(
+        Path(os.getenv("POCKETGIT_PROFILE_DIR", str(project_root / "state" / "profiles"))),
+        retention=int(os.getenv("POCKETGIT_PROFILE_RETENTION", "100")),
+    ),
+)
+
+
+def main(argv: List[str]) -> int:
+    if argv[:1] != ["sign"] or not profiler.secret:
+        print("usage: POCKETGIT_PROFILE_SECRET=... python -m app.utils.profiling sign [ttl-seconds]", file=sys.stderr)
+        return 2
+    ttl = int(argv[1]) if len(argv) > 1 else 3600
+    print(sign_token(profiler.secret, int(time.time()) + ttl))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
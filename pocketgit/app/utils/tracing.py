@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("pocketgit.tracing")
+
+current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("pocketgit_span", default=None)
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("pocketgit_request_id", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id: Optional[str] = parent.span_id
+            if "repo.id" in parent.attributes:
+                attributes.setdefault("repo.id", parent.attributes["repo.id"])
+        else:
+            self.trace_id = uuid.uuid4().hex
+            self.parent_id = None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self._tracer.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonLinesExporter:
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def export(self, spans: List[Span]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if self.path.stat().st_size > self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        except OSError:
+            pass
+        with self.path.open("a", encoding="utf-8") as handle:
+            for span in spans:
+                handle.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+class OtlpJsonExporter:
+    """POST spans as OTLP/HTTP JSON to a collector's ``/v1/traces`` endpoint."""
+
+    TIMEOUT_SECONDS = 5
+
+    def __init__(self, endpoint: str, service_name: str = "pocketgit"):
+        self.endpoint = endpoint
+        self.service_name = service_name
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "pocketgit"},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(span.end_ns),
+                                    "attributes": [
+                                        {"key": key, "value": _otlp_value(value)}
+                                        for key, value in span.attributes.items()
+                                        if value is not None
+                                    ],
+                                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans), default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.TIMEOUT_SECONDS):
+            pass
+
+
+class Tracer:
+    """Collect finished spans on a bounded queue and export them in batches from a background thread.
+
+    Finishing a span never blocks: when the exporter falls behind, spans are dropped and counted.
+    """
+
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 256
+    FLUSH_SECONDS = 1.0
+
+    def __init__(self, exporter: Any = None, slow_ms: float = 0.0):
+        self.exporter = exporter
+        self.slow_ms = slow_ms
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(self.QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None or self.slow_ms > 0
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        if not self.enabled:
+            return None
+        return Span(self, name, current_span.get(), dict(attributes or {}))
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Span]]:
+        span = self.start_span(name, attributes)
+        if span is None:
+            yield None
+            return
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.finish(exc)
+            raise
+        finally:
+            current_span.reset(token)
+            span.finish()
+
+    def finish(self, span: Span) -> None:
+        if self.slow_ms and span.duration_ms >= self.slow_ms:
+            logger.warning(
+                "slow span %s %.1fms request=%s attributes=%s",
+                span.name,
+                span.duration_ms,
+                request_id.get() or span.trace_id,
+                json.dumps(span.attributes, default=str),
+            )
+        if self.exporter is None:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pocketgit-tracing", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_SECONDS
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+            except Exception as exc:
+                self.dropped += len(batch)
+                logger.debug("span export failed: %s", exc)
+
+
+project_root = Path(__file__).resolve().parent.parent.parent
+
+
+def _create_exporter() -> Any:
+    kind = os.getenv("POCKETGIT_TRACE_EXPORTER", "none").lower()
+    if kind == "jsonl":
+        return JsonLinesExporter(
+            Path(os.getenv("POCKETGIT_TRACE_FILE", str(project_root / "state" / "traces" / "spans.jsonl"))),
+            max_bytes=int(os.getenv("POCKETGIT_TRACE_FILE_MB", "50")) * 1024 * 1024,
+        )
+    if kind == "otlp":
+        return OtlpJsonExporter(os.getenv("POCKETGIT_TRACE_OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces"))
+    return None
+
+
+tracer = Tracer(exporter=_create_exporter(), slow_ms=float(os.getenv("POCKETGIT_TRACE_SLOW_MS", "1000")))
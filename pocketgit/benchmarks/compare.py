@@ -0,0 +1,68 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_THRESHOLD = 0.2
+# Differences below this are timer noise, whatever the ratio.
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+def compare(
+    baseline: Dict[str, dict],
+    current: Dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> Tuple[List[dict], List[dict]]:
+    """Return every shared benchmark with its change, and the subset slower by more than ``threshold``."""
+
+    rows: List[dict] = []
+    regressions: List[dict] = []
+    for name in sorted(set(baseline["results"]) & set(current["results"])):
+        before = baseline["results"][name]["median_ms"]
+        after = current["results"][name]["median_ms"]
+        change = (after - before) / before if before else 0.0
+        row = {"name": name, "baseline_ms": before, "current_ms": after, "change": round(change, 3)}
+        rows.append(row)
+        if change > threshold and after - before > min_delta_ms:
+            regressions.append(row)
+    return rows, regressions
+
+
+def format_table(rows: List[dict], regressions: List[dict]) -> str:
+    flagged = {row["name"] for row in regressions}
+    width = max((len(row["name"]) for row in rows), default=10)
+    lines = [f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  {'change':>8}"]
+    for row in rows:
+        marker = "  REGRESSION" if row["name"] in flagged else ""
+        lines.append(
+            f"{row['name']:<{width}}  {row['baseline_ms']:>8.2f}ms  {row['current_ms']:>8.2f}ms  "
+            f"{row['change'] * 100:>+7.1f}%{marker}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args()
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    rows, regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    print(format_table(rows, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Check that importing ``app.main`` stays within a time budget and leaves heavy work for later.
+
+Run from the ``pocketgit`` directory::
+
+    python -m benchmarks.import_time --budget-ms 800
+
+Each run imports the app in a fresh interpreter. The check fails (exit status 1) when the median
+import time exceeds the budget, when a library that should load on first use (GitPython, passlib,
+PyJWT, cryptography) was imported, or when a service singleton was built during import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+DEFERRED_MODULES = ("git", "passlib", "jwt", "cryptography", "bcrypt")
+LAZY_SERVICES = {
+    "app.services.auth_service": "auth_service",
+    "app.services.repo_manager": "repo_manager",
+    "app.services.secret_manager": "secret_manager",
+    "app.services.ssh_keys": "ssh_key_manager",
+}
+DEFAULT_BUDGET_MS = float(os.getenv("POCKETGIT_IMPORT_BUDGET_MS", "800"))
+
+CHILD = """
+import importlib, json, sys, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+# Eagerly built services have no ``resolved`` flag, so they count as built.
+services = {name: getattr(getattr(importlib.import_module(module), name), "resolved", True) for module, name in %r.items()}
+print(json.dumps({
+    "ms": elapsed * 1000,
+    "deferred": [name for name in %r if name in sys.modules],
+    "built": [name for name, resolved in services.items() if resolved],
+}))
+"""
+
+
+def import_once(root: Path, importtime: bool = False) -> Tuple[Dict[str, Any], str]:
+    flags = ["-X", "importtime"] if importtime else []
+    command = [sys.executable, *flags, "-c", CHILD % (LAZY_SERVICES, DEFERRED_MODULES)]
+    result = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(importtime_output: str, prefix: str, count: int) -> List[Tuple[str, float]]:
+    """Cumulative import time per module from ``-X importtime`` output, slowest first."""
+
+    modules: Dict[str, float] = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name.strip()
+        if name.startswith(prefix) and cumulative.strip().isdigit():
+            modules[name] = int(cumulative) / 1000
+    return sorted(modules.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import time budget of app.main.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10, help="list the slowest app modules")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    import_once(root)  # Compile bytecode so the timed runs do not include it.
+    runs = [import_once(root)[0] for _ in range(args.runs)]
+    median_ms = statistics.median(run["ms"] for run in runs)
+    report, importtime_output = import_once(root, importtime=True)
+
+    print(f"import app.main: median {median_ms:.0f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    for name, milliseconds in slowest_imports(importtime_output, "app.", args.top + 1)[1:]:  # [0] is app.main
+        print(f"  {milliseconds:8.1f}ms  {name}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+    if report["deferred"]:
+        failures.append(f"imported at startup instead of on first use: {', '.join(report['deferred'])}")
+    if report["built"]:
+        failures.append(f"service singletons built at import time: {', '.join(report['built'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Compare ``git status`` and staging on a synthetic repository with and without the large repo profile.
+
+Run from the ``pocketgit`` directory::
+
+    python -m benchmarks.large_repo_profile --files 100000 --rounds 5
+
+The same synthetic tree is cloned twice; one clone gets the profile from
+``app.services.repo_profile``. Each round edits a handful of tracked files and adds a few untracked
+ones, then times a clean status, a dirty status, ``GitRepo.stage`` and ``git add -A``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from app.services.git_repo import GitRepo
+from app.services.repo_profile import RepoProfileService
+
+FILES_PER_DIRECTORY = 500
+COMMIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@local",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@local",
+}
+
+
+def git(repo_path: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo_path, check=True, capture_output=True, env=dict(os.environ, **COMMIT_ENV))
+
+
+def make_synthetic_repo(path: Path, files: int) -> None:
+    path.mkdir(parents=True)
+    git(path, "init", "--quiet", "--initial-branch=main")
+    for index in range(files):
+        directory = path / f"dir{index // FILES_PER_DIRECTORY:04d}"
+        if index % FILES_PER_DIRECTORY == 0:
+            directory.mkdir()
+        (directory / f"file{index:06d}.txt").write_text(f"line {index}\n", encoding="utf-8")
+    git(path, "add", "-A")
+    git(path, "commit", "--quiet", "-m", "Synthetic tree")
+
+
+def timed(action: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def run_round(repo_path: Path, round_index: int, edits: int) -> Dict[str, float]:
+    repo = GitRepo(repo_path.name, repo_path.parent)
+    results = {"status_clean": timed(repo.get_status)}
+    changed: List[str] = []
+    for offset in range(edits):
+        # One file per directory, spread over the tree so status cannot skip whole directories.
+        relative = f"dir{offset:04d}/file{offset * FILES_PER_DIRECTORY + round_index:06d}.txt"
+        with (repo_path / relative).open("a", encoding="utf-8") as handle:
+            handle.write(f"round {round_index}\n")
+        changed.append(relative)
+        untracked = f"dir{offset:04d}/new-{round_index}-{offset}.txt"
+        (repo_path / untracked).write_text("new\n", encoding="utf-8")
+    results["status_dirty"] = timed(repo.get_status)
+    results["stage_paths"] = timed(lambda: repo.stage(changed))
+    results["stage_all"] = timed(repo.stage_all)
+    git(repo_path, "commit", "--quiet", "-m", f"Round {round_index}")
+    return results
+
+
+def benchmark(work_dir: Path, files: int, rounds: int, edits: int) -> Tuple[Dict[str, Dict[str, float]], dict]:
+    source = work_dir / "source"
+    make_synthetic_repo(source, files)
+    variants = {"stock": work_dir / "stock", "profiled": work_dir / "profiled"}
+    for target in variants.values():
+        git(work_dir, "clone", "--quiet", "--no-hardlinks", str(source), target.name)
+    profile = RepoProfileService(mode="always").apply(variants["profiled"])
+
+    report: Dict[str, Dict[str, float]] = {}
+    for name, repo_path in variants.items():
+        # Warm the OS cache and, for the profiled clone, the untracked cache.
+        git(repo_path, "status", "--porcelain")
+        samples: Dict[str, List[float]] = {}
+        for round_index in range(rounds):
+            for metric, value in run_round(repo_path, round_index, edits).items():
+                samples.setdefault(metric, []).append(value)
+        report[name] = {metric: round(statistics.median(values) * 1000, 1) for metric, values in samples.items()}
+    report["speedup"] = {
+        metric: round(report["stock"][metric] / report["profiled"][metric], 2)
+        for metric in report["stock"]
+        if report["profiled"][metric]
+    }
+    return report, profile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the generated repositories")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="pocketgit-bench-"))
+    try:
+        edits = min(args.edits, max(1, args.files // FILES_PER_DIRECTORY))
+        report, profile = benchmark(work_dir, args.files, args.rounds, edits)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print(json.dumps({"files": args.files, "rounds": args.rounds, "profile": profile, "medianMs": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
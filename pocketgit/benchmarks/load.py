@@ -0,0 +1,445 @@
+"""Load-test a running PocketGit server with simulated UI users.
+
+Start the server the way it will be deployed, then point the harness at it::
+
+    uvicorn app.main:app --port 8000 --workers 4
+    python -m benchmarks.load --url http://127.0.0.1:8000 --users 50 --duration 60 --mix ui
+
+Unless ``--repo-id`` names an existing repository, the harness generates a synthetic repository,
+makes a bare copy of it in a temporary directory and clones that through ``/clone``, so push and
+fetch run against a local bare remote. The cloned repository is left on the server afterwards.
+Each simulated user keeps one keep-alive connection, picks actions from the traffic mix with think
+time between them, and the run reports throughput, latency percentiles and error rates per route.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import shutil
+import ssl
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .synthetic import SEARCH_TOKEN, RepoShape, generate_repo, git
+
+# Relative weights of the actions each simulated user picks from.
+MIXES: Dict[str, Dict[str, int]] = {
+    "ui": {
+        "status": 30,
+        "tree": 20,
+        "file_read": 15,
+        "file_write": 8,
+        "log": 5,
+        "diff": 5,
+        "search": 5,
+        "branches": 4,
+        "offline_commit": 4,
+        "stage_commit": 2,
+        "fetch": 1,
+        "push": 1,
+    },
+    "polling": {"status": 60, "tree": 30, "file_read": 10},
+    "editing": {"file_read": 20, "file_write": 30, "status": 20, "diff": 10, "offline_commit": 15, "push": 5},
+    "sync": {"fetch": 40, "push": 40, "status": 20},
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpConnection:
+    """A minimal HTTP/1.1 client over one keep-alive connection (Content-Length and chunked bodies)."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.secure = parts.scheme == "https"
+        self.port = parts.port or (443 if self.secure else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        context = ssl.create_default_context() if self.secure else None
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context), self.timeout
+        )
+
+    async def close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        target = self.prefix + path + (f"?{urlencode(params)}" if params else "")
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+        # A kept-alive connection may have been closed by the server while idle; retry once on a new one.
+        for attempt in range(2):
+            reused = self._writer is not None
+            if not reused:
+                await self._connect()
+            try:
+                self._writer.write(message)
+                await self._writer.drain()
+                return await asyncio.wait_for(self._read_response(method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                await self.close()
+                if not reused or attempt:
+                    raise HttpError(f"connection failed: {exc}") from exc
+            except BaseException:
+                await self.close()
+                raise
+        raise HttpError("unreachable")
+
+    async def _read_response(self, method: str) -> Tuple[int, bytes]:
+        reader = self._reader
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        headers: Dict[str, str] = {}
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if size == 0:
+                    await self._skip_trailers()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+    async def _skip_trailers(self) -> None:
+        while (await self._reader.readuntil(b"\r\n")) != b"\r\n":
+            pass
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: str) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not status.isdigit() or int(status) >= 400:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        result: Dict[str, Any] = {
+            "requests": count,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "errors": self.errors,
+            "errorRate": round(self.errors / count, 4) if count else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+        for percentile in PERCENTILES:
+            index = min(count - 1, max(0, math.ceil(percentile / 100 * count) - 1))
+            result[f"p{percentile}Ms"] = round(ordered[index] * 1000, 1) if count else None
+        result["maxMs"] = round(ordered[-1] * 1000, 1) if count else None
+        return result
+
+
+@dataclass
+class Target:
+    repo_id: str
+    files: List[str]
+    search: str
+
+
+class SimulatedUser:
+    def __init__(
+        self,
+        index: int,
+        connection: HttpConnection,
+        token: str,
+        target: Target,
+        stats: Dict[str, RouteStats],
+        burst: int,
+        rng: random.Random,
+    ):
+        self.index = index
+        self.connection = connection
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.target = target
+        self.stats = stats
+        self.burst = burst
+        self.rng = rng
+        self.edits = 0
+        self.actions: Dict[str, Callable[[], Awaitable[None]]] = {
+            "status": lambda: self.call("GET", "/status"),
+            "tree": self.tree,
+            "file_read": lambda: self.call("GET", "/file", params={"path": self.rng.choice(self.target.files)}),
+            "file_write": self.file_write,
+            "log": lambda: self.call("GET", "/log"),
+            "diff": lambda: self.call("GET", "/diff"),
+            "search": lambda: self.call("GET", "/search", params={"q": self.target.search}),
+            "branches": lambda: self.call("GET", "/branches", params={"detail": "true"}),
+            "offline_commit": self.offline_commit,
+            "stage_commit": self.stage_commit,
+            "fetch": lambda: self.call("POST", "/fetch"),
+            "push": lambda: self.call("POST", "/push"),
+        }
+
+    @property
+    def scratch_path(self) -> str:
+        return f"loadtest/user-{self.index:04d}.txt"
+
+    async def call(self, method: str, suffix: str, params: Optional[Dict[str, Any]] = None, body: Any = None) -> int:
+        route = f"{method} /repo/{{repoId}}{suffix}"
+        start = time.perf_counter()
+        try:
+            status, _ = await self.connection.request(
+                method, f"/repo/{self.target.repo_id}{suffix}", params, body, self.headers
+            )
+            outcome = str(status)
+        except (HttpError, OSError, asyncio.TimeoutError, ValueError) as exc:
+            status, outcome = 0, type(exc).__name__
+        self.stats.setdefault(route, RouteStats()).record(time.perf_counter() - start, outcome)
+        return status
+
+    async def tree(self) -> None:
+        directory = str(Path(self.rng.choice(self.target.files)).parent)
+        await self.call("GET", "/tree", params={"path": directory} if directory != "." else None)
+
+    async def file_write(self) -> None:
+        self.edits += 1
+        await self.call("PUT", "/file", body={"path": self.scratch_path, "content": f"edit {self.edits}\n"})
+
+    async def offline_commit(self) -> None:
+        # The UI syncs a queue of offline edits as several commits back to back.
+        for _ in range(self.burst):
+            self.edits += 1
+            changes = [{"path": self.scratch_path, "content": f"offline edit {self.edits}\n"}]
+            await self.call("POST", "/offline-commit", body={"changes": changes, "message": f"Offline edit {self.edits}"})
+
+    async def stage_commit(self) -> None:
+        await self.file_write()
+        await self.call("POST", "/stage", body={"paths": [self.scratch_path]})
+        await self.call(
+            "POST",
+            "/commit",
+            body={"message": f"Load test edit {self.edits}", "authorName": "loadtest", "authorEmail": "loadtest@local"},
+        )
+
+    async def run(self, mix: Dict[str, int], deadline: float, think: float, start_delay: float) -> None:
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        await asyncio.sleep(start_delay)
+        try:
+            while time.monotonic() < deadline:
+                await self.actions[self.rng.choices(names, weights)[0]]()
+                if think:
+                    await asyncio.sleep(min(self.rng.expovariate(1 / think), max(0.0, deadline - time.monotonic())))
+        finally:
+            await self.connection.close()
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    if value in MIXES:
+        return MIXES[value]
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in MIXES["ui"] or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(
+                f"expected a preset ({', '.join(MIXES)}) or action=weight pairs from: {', '.join(MIXES['ui'])}"
+            )
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("at least one action needs a positive weight")
+    return mix
+
+
+async def login(connection: HttpConnection, username: str, password: str) -> str:
+    credentials = {"username": username, "password": password}
+    status, body = await connection.request("POST", "/auth/register", body=credentials)
+    if status not in (201, 409):
+        raise HttpError(f"register failed with {status}: {body.decode('utf-8', 'replace')}")
+    status, body = await connection.request("POST", "/auth/login", body=credentials)
+    if status != 200:
+        raise HttpError(f"login failed with {status}: {body.decode('utf-8', 'replace')}")
+    return json.loads(body)["token"]
+
+
+async def prepare_target(connection: HttpConnection, token: str, args: argparse.Namespace, work_dir: Path) -> Target:
+    headers = {"Authorization": f"Bearer {token}"}
+    if args.repo_id:
+        return Target(args.repo_id, await discover_files(connection, headers, args.repo_id), args.search)
+
+    shape = RepoShape(files=args.files, history=5, branches=3, lfs_pointers=0, untracked=0)
+    synthetic = generate_repo(work_dir / "source", shape)
+    remote = work_dir / "remote.git"
+    git(work_dir, "clone", "--quiet", "--bare", str(synthetic.path), str(remote))
+    status, body = await connection.request("POST", "/clone", body={"url": str(remote)}, headers=headers)
+    if status != 200:
+        raise HttpError(f"clone failed with {status}: {body.decode('utf-8', 'replace')}")
+    return Target(json.loads(body)["repoId"], synthetic.tracked, SEARCH_TOKEN)
+
+
+async def discover_files(connection: HttpConnection, headers: Dict[str, str], repo_id: str, limit: int = 500) -> List[str]:
+    files: List[str] = []
+    pending = [""]
+    while pending and len(files) < limit:
+        directory = pending.pop(0)
+        status, body = await connection.request(
+            "GET", f"/repo/{repo_id}/tree", params={"path": directory} if directory else None, headers=headers
+        )
+        if status != 200:
+            raise HttpError(f"listing {directory or '/'} failed with {status}")
+        for entry in json.loads(body)["entries"]:
+            path = f"{directory}/{entry['name']}" if directory else entry["name"]
+            (files if entry["type"] == "file" else pending).append(path)
+    if not files:
+        raise HttpError(f"repository {repo_id} has no files to read")
+    return files
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    setup = HttpConnection(args.url, args.timeout)
+    work_dir = Path(tempfile.mkdtemp(prefix="pocketgit-load-"))
+    try:
+        token = await login(setup, args.username, args.password)
+        target = await prepare_target(setup, token, args, work_dir)
+        await setup.close()
+
+        stats: Dict[str, RouteStats] = {}
+        rng = random.Random(args.seed)
+        users = [
+            SimulatedUser(
+                index,
+                HttpConnection(args.url, args.timeout),
+                token,
+                target,
+                stats,
+                args.burst,
+                random.Random(rng.random()),
+            )
+            for index in range(args.users)
+        ]
+        started = time.monotonic()
+        deadline = started + args.ramp_up + args.duration
+        await asyncio.gather(
+            *(
+                user.run(args.mix, deadline, args.think_ms / 1000, args.ramp_up * index / max(1, args.users))
+                for index, user in enumerate(users)
+            )
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        await setup.close()
+        # The server's clone keeps working without its bare remote; only push and fetch stop.
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    total = RouteStats()
+    for route_stats in stats.values():
+        total.latencies.extend(route_stats.latencies)
+        total.errors += route_stats.errors
+        for status, count in route_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    return {
+        "meta": {
+            "url": args.url,
+            "repoId": target.repo_id,
+            "users": args.users,
+            "durationSeconds": round(elapsed, 2),
+            "thinkMs": args.think_ms,
+            "mix": args.mix,
+        },
+        "total": total.summary(elapsed),
+        "routes": {route: stats[route].summary(elapsed) for route in sorted(stats)},
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = f"{'route':42} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>8}"
+    lines = [header]
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, summary in rows:
+        lines.append(
+            f"{route:42} {summary['requests']:>7} {summary['rps']:>8.1f} "
+            f"{summary['p50Ms'] or 0:>8.1f} {summary['p95Ms'] or 0:>8.1f} {summary['p99Ms'] or 0:>8.1f} "
+            f"{summary['maxMs'] or 0:>8.1f} {summary['errorRate']:>8.2%}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test a running PocketGit server with simulated UI users.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="mean pause between a user's actions")
+    parser.add_argument("--mix", type=parse_mix, default=MIXES["ui"], help="preset name or action=weight,...")
+    parser.add_argument("--burst", type=int, default=3, help="commits per offline-commit burst")
+    parser.add_argument("--repo-id", help="use an existing repository instead of cloning a synthetic one")
+    parser.add_argument("--files", type=int, default=2000, help="size of the synthetic repository")
+    parser.add_argument("--search", default=SEARCH_TOKEN, help="search query for --repo-id repositories")
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_load(args))
+    except (HttpError, OSError) as exc:
+        print(f"load test setup failed: {exc}", file=sys.stderr)
+        return 2
+    print(format_report(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
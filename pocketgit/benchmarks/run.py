@@ -0,0 +1,276 @@
+"""Time core ``GitRepo`` operations and API routes against a synthetic repository.
+
+Run from the ``pocketgit`` directory::
+
+    python -m benchmarks.run --shape small --repeat 7 --output bench.json
+    python -m benchmarks.run --shape small --baseline bench.json --threshold 0.2
+
+Everything runs against a temporary data directory; the real ``repos/`` and ``auth/`` are untouched.
+Results are written as JSON (medians in milliseconds) so runs from different commits can be compared
+with ``benchmarks.compare``; with ``--baseline`` the exit status is 1 when anything regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .compare import DEFAULT_MIN_DELTA_MS, DEFAULT_THRESHOLD, compare, format_table
+from .synthetic import SEARCH_TOKEN, RepoShape, SyntheticRepo, file_content, generate_repo
+
+SHAPES = {
+    "small": RepoShape(files=1000, depth=2, history=20, branches=10, lfs_pointers=10, untracked=20),
+    "medium": RepoShape(files=10000, depth=2, history=50, branches=50, lfs_pointers=50, untracked=200),
+    "large": RepoShape(files=100000, depth=3, history=100, branches=200, lfs_pointers=200, untracked=2000),
+}
+REPO_ID = "bench"
+BENCH_USER = "bench"
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "runs": len(ordered),
+    }
+
+
+def measure(action: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    samples: List[float] = []
+    for attempt in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        if attempt:  # The first run only warms caches.
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+class Mutator:
+    """Rewrite a rotating set of tracked files so stage, diff and commit always have work to do."""
+
+    def __init__(self, repo: SyntheticRepo, count: int):
+        self.repo = repo
+        self.count = max(1, count)
+        self.round = 0
+        self.changed: List[str] = []
+
+    def __call__(self) -> None:
+        self.round += 1
+        rng = random.Random(self.round)
+        tracked = self.repo.tracked
+        start = (self.round * self.count) % max(1, len(tracked))
+        self.changed = [tracked[(start + offset) % len(tracked)] for offset in range(min(self.count, len(tracked)))]
+        for relative in self.changed:
+            (self.repo.path / relative).write_text(
+                file_content(rng, self.repo.shape.file_size, 1000 + self.round), encoding="utf-8"
+            )
+
+
+def bench_repo_operations(synthetic: SyntheticRepo, base_path: Path, repeat: int) -> Dict[str, Dict[str, Any]]:
+    from app.services.git_repo import GitRepo
+
+    def repo() -> GitRepo:
+        # Routes build a GitRepo per request, so its construction is part of every measurement.
+        return GitRepo(REPO_ID, base_path)
+
+    deep_directory = str(Path(synthetic.tracked[0]).parent)
+    results = {
+        "repo.get_status": measure(lambda: repo().get_status(), repeat),
+        "repo.get_tree(root)": measure(lambda: repo().get_tree(None), repeat),
+        "repo.get_tree(deep)": measure(lambda: repo().get_tree(deep_directory), repeat),
+        "repo.search": measure(lambda: repo().search(SEARCH_TOKEN), repeat),
+        "repo.list_lfs_pointers": measure(lambda: repo().list_lfs_pointers(), repeat),
+    }
+
+    mutate = Mutator(synthetic, synthetic.shape.changes_per_commit)
+    mutate()
+    results["repo.get_diff"] = measure(lambda: repo().get_diff(), repeat)
+    results["repo.get_status(dirty)"] = measure(lambda: repo().get_status(), repeat)
+
+    stage_samples: List[float] = []
+    commit_samples: List[float] = []
+    for attempt in range(repeat + 1):
+        mutate()
+        instance = repo()
+        start = time.perf_counter()
+        instance.stage(mutate.changed)
+        staged = time.perf_counter()
+        instance.commit(f"Benchmark commit {attempt}", "bench", "bench@local")
+        committed = time.perf_counter()
+        if attempt:
+            stage_samples.append(staged - start)
+            commit_samples.append(committed - staged)
+    results["repo.stage"] = summarize(stage_samples)
+    results["repo.commit"] = summarize(commit_samples)
+    return results
+
+
+def bench_routes(synthetic: SyntheticRepo, data_dir: Path, repeat: int) -> Dict[str, Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services.activity_log import activity_logger
+    from app.services.auth_service import auth_service
+    from app.services.repo_manager import repo_manager
+    from app.services.repo_summaries import RepoSummaryCache
+
+    # Point the service singletons at the temporary data directory.
+    repos_path = data_dir / "repos"
+    repo_manager.base_path = repos_path
+    repo_manager.summary_cache = RepoSummaryCache(repos_path / repo_manager.SUMMARY_CACHE_FILENAME)
+    activity_logger.base_path = repos_path
+    # Token checks only need the user to exist, so skip bcrypt and write the users file directly.
+    auth_service.store = None
+    auth_service.users_path = data_dir / "users.json"
+    auth_service.users_path.write_text(json.dumps({BENCH_USER: "unused"}), encoding="utf-8")
+    headers = {"Authorization": f"Bearer {auth_service.create_access_token(BENCH_USER)}"}
+
+    client = TestClient(app)
+    errors: Dict[str, int] = {}
+
+    def call(method: str, url: str, label: str, **kwargs: Any) -> Callable[[], None]:
+        def action() -> None:
+            response = client.request(method, url, headers=headers, **kwargs)
+            if response.status_code >= 400:
+                errors[label] = errors.get(label, 0) + 1
+
+        return action
+
+    base = f"/repo/{REPO_ID}"
+    sample_file = synthetic.tracked[0]
+    deep_directory = str(Path(sample_file).parent)
+    reads = {
+        "GET /repos": ("GET", "/repos", {}),
+        "GET /repo/{repoId}/status": ("GET", f"{base}/status", {}),
+        "GET /repo/{repoId}/tree": ("GET", f"{base}/tree", {}),
+        "GET /repo/{repoId}/tree?path=deep": ("GET", f"{base}/tree", {"params": {"path": deep_directory}}),
+        "GET /repo/{repoId}/file": ("GET", f"{base}/file", {"params": {"path": sample_file}}),
+        "GET /repo/{repoId}/search": ("GET", f"{base}/search", {"params": {"q": SEARCH_TOKEN}}),
+        "GET /repo/{repoId}/branches?detail=true": ("GET", f"{base}/branches", {"params": {"detail": "true"}}),
+        "GET /repo/{repoId}/log": ("GET", f"{base}/log", {}),
+        "GET /repo/{repoId}/lfs/list": ("GET", f"{base}/lfs/list", {}),
+        "GET /repo/{repoId}/diff": ("GET", f"{base}/diff", {}),
+    }
+    results = {
+        f"route.{label}": measure(call(method, url, label, **kwargs), repeat)
+        for label, (method, url, kwargs) in reads.items()
+    }
+
+    mutate = Mutator(synthetic, synthetic.shape.changes_per_commit)
+    stage_commit = "POST /repo/{repoId}/stage+commit"
+
+    def stage_and_commit() -> None:
+        call("POST", f"{base}/stage", stage_commit, json={"paths": mutate.changed})()
+        call(
+            "POST",
+            f"{base}/commit",
+            stage_commit,
+            json={"message": "Benchmark commit", "authorName": "bench", "authorEmail": "bench@local"},
+        )()
+
+    results[f"route.{stage_commit}"] = measure(stage_and_commit, repeat, setup=mutate)
+
+    offline_round = {"value": 0}
+
+    def offline_commit() -> None:
+        offline_round["value"] += 1
+        changes = [
+            {"path": relative, "content": f"offline edit {offline_round['value']}\n"}
+            for relative in synthetic.tracked[: synthetic.shape.changes_per_commit]
+        ]
+        call("POST", f"{base}/offline-commit", "POST /repo/{repoId}/offline-commit", json={"changes": changes})()
+
+    results["route.POST /repo/{repoId}/offline-commit"] = measure(offline_commit, repeat)
+    for label, count in errors.items():
+        results_key = f"route.{label}"
+        if results_key in results:
+            results[results_key]["errors"] = count
+    return results
+
+
+def metadata(shape: RepoShape, repeat: int) -> Dict[str, Any]:
+    def output(*command: str) -> Optional[str]:
+        try:
+            return subprocess.run(command, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": output("git", "rev-parse", "HEAD"),
+        "git": output("git", "--version"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "repeat": repeat,
+        "shape": {field.name: getattr(shape, field.name) for field in fields(shape)},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PocketGit against a synthetic repository.")
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="small")
+    for shape_field in fields(RepoShape):
+        parser.add_argument(f"--{shape_field.name.replace('_', '-')}", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-routes", action="store_true", help="only time GitRepo operations")
+    parser.add_argument("--output", type=Path, help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    parser.add_argument("--keep", action="store_true", help="keep the generated data directory")
+    args = parser.parse_args()
+
+    overrides = {
+        shape_field.name: getattr(args, shape_field.name)
+        for shape_field in fields(RepoShape)
+        if getattr(args, shape_field.name) is not None
+    }
+    shape = replace(SHAPES[args.shape], **overrides)
+
+    warnings.filterwarnings("ignore")
+    data_dir = Path(tempfile.mkdtemp(prefix="pocketgit-bench-"))
+    try:
+        started = time.perf_counter()
+        synthetic = generate_repo(data_dir / "repos" / REPO_ID, shape)
+        generated_in = time.perf_counter() - started
+        results = bench_repo_operations(synthetic, data_dir / "repos", args.repeat)
+        if not args.skip_routes:
+            results.update(bench_routes(synthetic, data_dir, args.repeat))
+    finally:
+        if not args.keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {"meta": {**metadata(shape, args.repeat), "generate_seconds": round(generated_in, 2)}, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        rows, regressions = compare(baseline, report, args.threshold, args.min_delta_ms)
+        print(format_table(rows, regressions), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Generate synthetic git repositories of a configurable shape for benchmarks."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List
+
+COMMIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@local",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@local",
+}
+LFS_ATTRIBUTES = "lfs/** filter=lfs diff=lfs merge=lfs -text\n"
+# The first file of every directory contains this token, so search scans everything but matches a few lines.
+SEARCH_TOKEN = "needle-in-haystack"
+WORDS = ("alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa")
+
+
+@dataclass
+class RepoShape:
+    files: int = 1000
+    depth: int = 2
+    files_per_directory: int = 100
+    file_size: int = 512
+    history: int = 10
+    changes_per_commit: int = 10
+    branches: int = 5
+    lfs_pointers: int = 10
+    untracked: int = 20
+    seed: int = 1
+
+
+@dataclass
+class SyntheticRepo:
+    path: Path
+    shape: RepoShape
+    tracked: List[str] = field(default_factory=list)
+    lfs: List[str] = field(default_factory=list)
+    untracked: List[str] = field(default_factory=list)
+
+    def describe(self) -> dict:
+        return asdict(self.shape)
+
+
+def git(repo_path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args],
+        cwd=repo_path,
+        check=True,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, **COMMIT_ENV),
+    ).stdout
+
+
+def file_path(index: int, shape: RepoShape) -> str:
+    """Spread files over ``depth`` levels of directories holding ``files_per_directory`` files each."""
+
+    directory = index // max(1, shape.files_per_directory)
+    parts = []
+    for _ in range(max(1, shape.depth)):
+        parts.append(f"d{directory % 100:02d}")
+        directory //= 100
+    return "/".join(reversed(parts)) + f"/file{index:07d}.txt"
+
+
+def file_content(rng: random.Random, size: int, revision: int = 0, token: bool = False) -> str:
+    lines = [f"revision {revision}"]
+    if token:
+        lines.append(SEARCH_TOKEN)
+    length = len(lines[0])
+    while length < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(8))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def lfs_pointer(index: int) -> str:
+    oid = hashlib.sha256(f"lfs-object-{index}".encode("ascii")).hexdigest()
+    return f"version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize {1024 * (index + 1)}\n"
+
+
+def write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def generate_repo(path: Path, shape: RepoShape) -> SyntheticRepo:
+    """Create a repository at ``path``: an initial tree, ``history`` more commits, branches and noise."""
+
+    rng = random.Random(shape.seed)
+    path.mkdir(parents=True)
+    git(path, "init", "--quiet", "--initial-branch=main")
+    repo = SyntheticRepo(path=path, shape=shape)
+
+    for index in range(shape.files):
+        relative = file_path(index, shape)
+        write(path / relative, file_content(rng, shape.file_size, token=index % max(1, shape.files_per_directory) == 0))
+        repo.tracked.append(relative)
+    if shape.lfs_pointers:
+        write(path / ".gitattributes", LFS_ATTRIBUTES)
+        for index in range(shape.lfs_pointers):
+            relative = f"lfs/asset{index:05d}.bin"
+            # Written as pointers; with git-lfs installed its clean filter keeps pointer files as they are.
+            write(path / relative, lfs_pointer(index))
+            repo.lfs.append(relative)
+    git(path, "add", "-A")
+    git(path, "commit", "--quiet", "-m", "Initial synthetic tree")
+
+    for revision in range(1, shape.history + 1):
+        changed = rng.sample(repo.tracked, min(len(repo.tracked), shape.changes_per_commit))
+        for relative in changed:
+            write(path / relative, file_content(rng, shape.file_size, revision))
+        git(path, "add", "--", *changed)
+        git(path, "commit", "--quiet", "-m", f"Synthetic change {revision}")
+
+    for index in range(shape.branches):
+        back = index % (shape.history + 1)
+        git(path, "branch", f"bench/branch-{index:04d}", f"HEAD~{back}")
+
+    for index in range(shape.untracked):
+        relative = f"scratch/noise{index // 50:03d}/untracked{index:05d}.tmp"
+        write(path / relative, file_content(rng, 64))
+        repo.untracked.append(relative)
+    return repo